@@ -0,0 +1,175 @@
+# assetcache.py
+import os
+import threading
+from collections import OrderedDict
+from functools import partial
+
+from PyQt6.QtCore import Qt, QByteArray
+from PyQt6.QtGui import QImage, QImageReader
+from PyQt6.QtSvg import QSvgRenderer
+
+from imagepool import CANVAS_FORMAT
+
+DEFAULT_BYTE_BUDGET = 256 * 1024 * 1024  # 256 MB of decoded assets
+
+
+def file_key(path):
+    """Return the (path, mtime, size) identity of a file, or None if it cannot be read"""
+    try:
+        stat = os.stat(path)
+    except (OSError, TypeError, ValueError):
+        return None
+    return (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+
+
+def load_svg(path=""):
+    """
+    Parse path into a QSvgRenderer, with the elements svgoptimizer finds
+    invisible already removed, so they are not painted on every render.
+    """
+    if not path:
+        return QSvgRenderer()
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return QSvgRenderer(path)  # Let Qt report the file
+    # Imported here, the XML parser is only needed once the first SVG loads
+    from svgoptimizer import optimize_svg
+
+    optimized = optimize_svg(data)
+    if optimized is data:
+        return QSvgRenderer(path)  # Also keeps compressed .svgz files working
+    return QSvgRenderer(QByteArray(optimized))
+
+
+def read_canvas_image(path=""):
+    """Decode path into the format cards are painted in, so drawing it converts nothing"""
+    return QImage(path).convertToFormat(CANVAS_FORMAT)
+
+
+def read_fitted_image(path="", width=0, height=0):
+    """
+    Decode path straight to the largest size that fits width x height, keeping
+    its aspect ratio. Readers that can (JPEG) decode at the smaller size, others
+    scale while reading, either way the full-size image is never kept.
+    """
+    reader = QImageReader(path)
+    size = reader.size()
+    if size.isValid() and width > 0 and height > 0:
+        fitted = size.scaled(width, height, Qt.AspectRatioMode.KeepAspectRatio)
+        if fitted != size:
+            reader.setScaledSize(fitted)
+    return reader.read()
+
+
+class AssetCache:
+    """
+    LRU cache of parsed SVG renderers and decoded images.
+
+    Entries are keyed by absolute path plus file mtime and size, so an asset
+    edited on disk is reloaded on next use. Least recently used entries are
+    evicted once the estimated size of all entries exceeds byte_budget.
+
+    Images are kept as QImage rather than QPixmap so the cache can be shared
+    with render threads. Lookups are thread-safe; a QSvgRenderer must still
+    only be rendered from one thread at a time, hold svg_lock while rendering
+    one. Every renderer sharing the cache shares that lock.
+    """
+
+    def __init__(self, byte_budget=DEFAULT_BYTE_BUDGET):
+        self.byte_budget = byte_budget
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (asset, size in bytes)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.svg_lock = threading.Lock()  # Held around QSvgRenderer.render, see above
+
+    def svg(self, path):
+        """Return a QSvgRenderer for path, parsing and optimizing the file only on a miss"""
+        return self._get("svg", path, load_svg, self._svg_size)
+
+    def image(self, path):
+        """Return a decoded QImage for path, decoding the file only on a miss"""
+        return self._get("image", path, QImage, self._image_size)
+
+    def canvas_image(self, path):
+        """Return path decoded as read_canvas_image does, decoding the file only on a miss"""
+        return self._get("canvas image", path, read_canvas_image, self._image_size)
+
+    def fitted_image(self, path, width, height):
+        """
+        Return path decoded to fit width x height (see read_fitted_image), so
+        images drawn smaller than their source cost memory for the drawn size.
+        Each size of a file is decoded once.
+        """
+        loader = partial(read_fitted_image, width=width, height=height)
+        return self._get(("image", width, height), path, loader, self._image_size)
+
+    def asset_key(self, path):
+        return file_key(path)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "byte_budget": self.byte_budget,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _get(self, kind, path, loader, sizer):
+        if not path:
+            # Layers without a path (e.g. an unset illustration slot) have nothing to load
+            return loader()
+
+        asset_key = self.asset_key(path)
+        if asset_key is None:
+            # Missing or unreadable file: let Qt produce its null object, nothing to cache
+            with self._lock:
+                self.misses += 1
+            return loader(path)
+
+        key = (kind,) + asset_key  # kind also holds the decoded size of fitted images
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        # Decode outside the lock so threads loading different assets do not wait on each other
+        asset = loader(path)
+        size = sizer(asset, asset_key)
+        if size <= self.byte_budget:
+            with self._lock:
+                if key not in self._entries:
+                    self._entries[key] = (asset, size)
+                    self._bytes += size
+                    self._evict()
+        return asset
+
+    def _evict(self):
+        while self._bytes > self.byte_budget and self._entries:
+            _, (_, size) = self._entries.popitem(last=False)
+            self._bytes -= size
+
+    @staticmethod
+    def _svg_size(renderer, asset_key):
+        # The parsed tree is not measurable from Python; the source size is a fair proxy
+        return asset_key[2]
+
+    @staticmethod
+    def _image_size(image, asset_key):
+        return image.sizeInBytes()
@@ -0,0 +1,229 @@
+# batchrender.py
+"""
+Headless batch renderer.
+
+    python cardmaker.py render --template T.json --data D.csv --out DIR --format png|jpg|webp|tiff|pdf
+    python cardmaker.py render --template T.json --data D.csv --out DIR --atlas [--atlas-grid 10x7]
+
+Runs on an offscreen QGuiApplication, so it needs no display and never builds
+the CardMaker window.
+"""
+import argparse
+import csv
+import os
+import sys
+
+# Must be set before Qt creates the application
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt6.QtGui import QGuiApplication, QPageSize
+
+from cardtemplate import CardTemplate
+from cardrenderer import CardRenderer
+import cardexport
+from cardexport import IMAGE_FORMATS, PDF_PAGE_SIZES, ImageEncoding
+from imposition import ATLAS_COLUMNS, ATLAS_ROWS
+from carddata import iter_card_rows
+from rendercache import RenderCache
+from svgraster import DEFAULT_CACHE_DIR, SvgRasterCache
+from renderprofiler import RenderProfiler
+
+DEFAULT_PDF_NAME = "cards.pdf"
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="cardmaker render",
+        description="Render a card deck without opening the CardMaker window.",
+    )
+    parser.add_argument("--template", required=True, help="template JSON file")
+    parser.add_argument("--data", required=True, help="card data CSV file")
+    parser.add_argument("--out", required=True, help="output directory (or .pdf file for --format pdf)")
+    parser.add_argument(
+        "--format", choices=tuple(IMAGE_FORMATS) + ("pdf",), default="png", help="card image format or pdf"
+    )
+    parser.add_argument("--quality", type=int, default=-1, help="JPEG and WebP quality, 0-100")
+    parser.add_argument(
+        "--compression",
+        type=int,
+        default=-1,
+        help="PNG zlib level 0-9 (lower is faster, larger files) or TIFF compression (0 none, 1 LZW)",
+    )
+    parser.add_argument("--strip-alpha", action="store_true", help="write opaque cards without an alpha channel")
+    parser.add_argument(
+        "--atlas",
+        action="store_true",
+        help="write the cards as tiles of deck sheet images with an atlas.json index, for digital tabletops",
+    )
+    parser.add_argument(
+        "--atlas-grid",
+        type=parse_grid,
+        default=(ATLAS_COLUMNS, ATLAS_ROWS),
+        metavar="COLUMNSxROWS",
+        help=f"cards per atlas sheet (default {ATLAS_COLUMNS}x{ATLAS_ROWS})",
+    )
+    parser.add_argument("--max-sheet-size", type=int, metavar="PX", help="largest atlas sheet side, in pixels")
+    parser.add_argument("--tile-scale", type=float, default=1.0, help="atlas tile size relative to the card, e.g. 0.5")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="worker processes for PNG export (0 uses every CPU core)",
+    )
+    parser.add_argument(
+        "--page-size",
+        choices=[name for name, size in PDF_PAGE_SIZES.items() if size is not None],
+        default="A4",
+        help="PDF page size",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="render every PNG again instead of skipping cards unchanged since the last export",
+    )
+    parser.add_argument("--raster-pdf", action="store_true", help="embed rasterized cards instead of vector layers")
+    parser.add_argument("--impose", action="store_true", help="place as many cards as fit on each PDF page")
+    parser.add_argument("--gutter", type=int, default=0, help="space between imposed cards, in card pixels")
+    parser.add_argument("--no-crop-marks", action="store_true", help="leave crop marks off imposed sheets")
+    parser.add_argument("--duplex-back", metavar="PATH", help="card back (SVG or image) printed behind imposed sheets")
+    parser.add_argument(
+        "--svg-cache",
+        metavar="DIR",
+        nargs="?",
+        const=DEFAULT_CACHE_DIR,
+        help=f"keep SVG layers rasterized in DIR across runs (default {DEFAULT_CACHE_DIR})",
+    )
+    parser.add_argument("--stats", metavar="FILE", help="time each render stage and save the totals as JSON")
+    parser.add_argument("--trace", metavar="FILE", help="time each render stage and save a Chrome trace")
+    return parser
+
+
+def parse_grid(value):
+    columns, _, rows = value.lower().partition("x")
+    if not (columns.isdigit() and rows.isdigit()) or not int(columns) or not int(rows):
+        raise argparse.ArgumentTypeError(f"expected a grid such as 10x7, not {value}")
+    return int(columns), int(rows)
+
+
+def pdf_output_path(out):
+    if out.lower().endswith(".pdf"):
+        os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+        return out
+    os.makedirs(out, exist_ok=True)
+    return os.path.join(out, DEFAULT_PDF_NAME)
+
+
+def export(args, template, renderer, cards):
+    """Run the export selected by args, returns the card count and output path"""
+    if args.format != "pdf":
+        os.makedirs(args.out, exist_ok=True)
+        encoding = ImageEncoding(args.format, args.quality, args.compression, args.strip_alpha)
+        if args.atlas:
+            columns, rows = args.atlas_grid
+            count = cardexport.export_atlas(
+                renderer,
+                cards,
+                args.out,
+                columns,
+                rows,
+                scale=args.tile_scale,
+                max_sheet_size=args.max_sheet_size,
+                encoding=encoding,
+            )
+            return count, args.out
+        cache = None if args.no_cache else RenderCache(args.out, template, encoding=encoding.describe())
+        if args.workers != 1:
+            count = cardexport.export_png_parallel(
+                template,
+                cards,
+                args.out,
+                workers=args.workers or None,
+                cache=cache,
+                encoding=encoding,
+                svg_cache_dir=args.svg_cache,
+            )
+        else:
+            count = cardexport.export_png(renderer, cards, args.out, cache=cache, encoding=encoding)
+        if cache is not None:
+            cache.save(prune=True)
+            print(f"Render cache: {cache.summary()}")
+        return count, args.out
+
+    target = pdf_output_path(args.out)
+    page_size = QPageSize(PDF_PAGE_SIZES[args.page_size])
+    if args.impose:
+        count = cardexport.export_pdf_sheets(
+            renderer,
+            cards,
+            target,
+            page_size,
+            gutter=args.gutter,
+            crop_marks=not args.no_crop_marks,
+            back_path=args.duplex_back,
+            vector=not args.raster_pdf,
+        )
+    else:
+        count = cardexport.export_pdf(renderer, cards, target, page_size, vector=not args.raster_pdf)
+    return count, target
+
+
+def print_stage_totals(profiler):
+    """Print the time spent in each render stage, slowest first"""
+    totals = sorted(profiler.stage_totals().items(), key=lambda item: item[1], reverse=True)
+    if not totals:
+        print("No render stages timed (parallel workers are not profiled)")
+        return
+    print("Render stages (card includes the layer and text stages):")
+    for stage, total_ms in totals:
+        print(f"  {stage:<14} {total_ms:10.1f} ms")
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.atlas and args.format == "pdf":
+        parser.error("--atlas writes image sheets, pick an image --format")
+
+    template = CardTemplate.load_from_json(args.template)
+    if template is None:
+        return 1
+
+    if not os.path.isfile(args.data):
+        print(f"Failed to load card data: no such file {args.data}", file=sys.stderr)
+        return 1
+    cards = iter_card_rows(args.data)  # Streamed, the deck is never held in memory
+
+    app = QGuiApplication.instance() or QGuiApplication([sys.argv[0]])  # Needed for fonts and pixmaps
+    renderer = CardRenderer(template)
+    if args.stats or args.trace:
+        renderer.profiler = RenderProfiler()
+
+    try:
+        if args.svg_cache:
+            renderer.svg_rasters = SvgRasterCache(args.svg_cache, renderer.asset_cache)
+        count, target = export(args, template, renderer, cards)
+        if args.stats:
+            renderer.profiler.save_json(args.stats)
+        if args.trace:
+            renderer.profiler.save_chrome_trace(args.trace)
+    except (UnicodeDecodeError, csv.Error) as e:
+        print(f"Failed to read card data: {e}", file=sys.stderr)
+        return 1
+    except (ValueError, OSError) as e:
+        print(f"Failed to export cards: {e}", file=sys.stderr)
+        return 1
+
+    print(f"Rendered {count} cards to {target}")
+    if renderer.profiler is not None:
+        print_stage_totals(renderer.profiler)
+    stats = renderer.asset_cache.stats()
+    if stats["hits"] or stats["misses"]:  # Parallel workers keep their own caches
+        print(f"Asset cache: {stats['hits']} hits, {stats['misses']} misses")
+    stats = renderer.image_pool.stats()
+    if stats["allocated"]:
+        print(f"Card canvases: {stats['allocated']} allocated, {stats['reused']} reused")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
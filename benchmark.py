@@ -0,0 +1,375 @@
+# benchmark.py
+"""
+Performance benchmarks.
+
+    python benchmark.py [suite] [--sizes 10 1000 10000] [--templates ...] [--benchmarks ...] [--json FILE]
+    python benchmark.py startup [--runs N] [--top N]
+
+The suite renders synthetic decks built from the demo_data.csv columns with
+templates of growing complexity derived from demo_template.json. Every case
+runs in its own interpreter, so peak RSS belongs to that case alone.
+Everything runs on Qt's offscreen platform.
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# Must be set before Qt creates the application
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+DEMO_TEMPLATE_FILE = "demo_template.json"
+DEMO_CSV_FILE = "demo_data.csv"
+DEFAULT_STARTUP_RUNS = 5
+DEFAULT_TOP_IMPORTS = 15
+DEFAULT_DECK_SIZES = (10, 1000, 10000)
+TABLE_UPDATE_RUNS = 5
+BENCHMARKS = ("render_card", "export_png", "export_pdf", "update_card_data_table", "startup")
+DEFAULT_ENCODINGS = ("png",)  # cardexport.ImageEncoding specs export_png runs with
+DECK_SEED = 1234  # Synthetic decks are the same on every run
+
+# Layers added on top of the demo template for the "layered" template. They
+# come after the illustration slot, so they are drawn for every card.
+EXTRA_LAYERS = [
+    {"path": "card_back.svg", "type": "svg", "position": [0, 0]},
+    {"path": "template.svg", "type": "svg", "position": [0, 0]},
+    {"path": "card_images/equipment.png", "type": "png", "position": [100, 150]},
+    {"path": "card_front.svg", "type": "svg", "position": [0, 0]},
+]
+TEMPLATES = ("text", "demo", "layered")
+
+# Run in a child interpreter: time to import cardmaker, build the window and show the first card
+STARTUP_SCRIPT = """
+import time
+start = time.perf_counter()
+import cardmaker
+imported = time.perf_counter()
+app = cardmaker.QApplication([])
+window = cardmaker.CardMaker()
+window.show()
+app.processEvents()
+shown = time.perf_counter()
+deadline = shown + 30
+while window.card_preview_label.pixmap().isNull() and time.perf_counter() < deadline:
+    app.processEvents()
+    window.preview_pool.waitForDone(10)
+previewed = time.perf_counter()
+print(imported - start, shown - start, previewed - start)
+"""
+
+
+def run_python(args):
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen", PYTHONDONTWRITEBYTECODE="1")
+    return subprocess.run(
+        [sys.executable] + args, cwd=REPO_DIR, env=env, capture_output=True, text=True, check=True
+    )
+
+
+def parse_importtime(output):
+    """Return {module: (self us, cumulative us)} from the stderr of python -X importtime"""
+    imports = {}
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = [field.strip() for field in line[len("import time:"):].split("|")]
+        if not fields[0].isdigit():
+            continue  # Header line
+        imports[fields[2].strip()] = (int(fields[0]), int(fields[1]))
+    return imports
+
+
+def time_startup(runs=DEFAULT_STARTUP_RUNS):
+    """Return {phase: [seconds per run]} for import, window shown and first preview"""
+    phases = {"import": [], "window shown": [], "first preview": []}
+    for _ in range(runs):
+        result = run_python(["-c", STARTUP_SCRIPT])
+        for name, seconds in zip(phases, result.stdout.split()[-3:]):
+            phases[name].append(float(seconds))
+    return phases
+
+
+def benchmark_startup(runs=DEFAULT_STARTUP_RUNS, top=DEFAULT_TOP_IMPORTS):
+    """Print startup phase timings and the slowest imports of cardmaker"""
+    phases = time_startup(runs)
+    print(f"Startup over {runs} runs (median, min):")
+    for name, samples in phases.items():
+        print(f"  {name:<14} {statistics.median(samples) * 1000:8.1f} ms {min(samples) * 1000:8.1f} ms")
+
+    imports = parse_importtime(run_python(["-X", "importtime", "-c", "import cardmaker"]).stderr)
+    print("\nSlowest imports (ms, self / cumulative):")
+    slowest = sorted(imports.items(), key=lambda item: item[1][0], reverse=True)[:top]
+    for name, (self_us, cumulative_us) in slowest:
+        print(f"  {name:<40} {self_us / 1000:8.1f} {cumulative_us / 1000:8.1f}")
+    return phases
+
+
+def synthetic_deck(rows):
+    """rows cards with the demo_data.csv columns, names made unique and stats randomized"""
+    from carddata import iter_card_rows
+
+    demo_rows = list(iter_card_rows(os.path.join(REPO_DIR, DEMO_CSV_FILE)))
+    rng = random.Random(DECK_SEED)
+    deck = []
+    for i in range(rows):
+        card = dict(demo_rows[i % len(demo_rows)])
+        card["Name"] = f"{card['Name']} #{i + 1}"
+        for stat, high in (("Attack", 10), ("Defense", 10), ("Health", 200)):
+            if stat in card:
+                card[stat] = str(rng.randint(0, high))
+        deck.append(card)
+    return deck
+
+
+def synthetic_template(name):
+    """
+    text: the demo template's fields without any layer
+    demo: demo_template.json as shipped
+    layered: the demo template with EXTRA_LAYERS drawn on every card
+    """
+    from cardtemplate import CardTemplate
+
+    with open(os.path.join(REPO_DIR, DEMO_TEMPLATE_FILE)) as f:
+        data = json.load(f)
+    if name == "text":
+        data["layers"] = []
+    elif name == "layered":
+        data["layers"] = data["layers"] + [dict(layer) for layer in EXTRA_LAYERS]
+    elif name != "demo":
+        raise ValueError(f"Unknown benchmark template {name}")
+    return CardTemplate(data)
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB, None where it cannot be read"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def summarize(benchmark, template, cards, seconds, latencies):
+    """Result row for a case that handled cards in seconds, latencies are per card or per call"""
+    if len(latencies) > 1:
+        p50 = statistics.median(latencies)
+        p95 = statistics.quantiles(latencies, n=100, method="inclusive")[94]
+    else:
+        p50 = p95 = latencies[0] if latencies else None
+    return {
+        "benchmark": benchmark,
+        "template": template,
+        "cards": cards,
+        "seconds": seconds,
+        "cards_per_second": cards / seconds if cards and seconds else None,
+        "p50_ms": p50 * 1000 if p50 is not None else None,
+        "p95_ms": p95 * 1000 if p95 is not None else None,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+class LatencyRecorder:
+    """Progress callback recording the time between successive cards"""
+
+    def __init__(self):
+        self.latencies = []
+        self._last = time.perf_counter()
+
+    def __call__(self, *_):
+        now = time.perf_counter()
+        self.latencies.append(now - self._last)
+        self._last = now
+
+
+def run_case(benchmark, template_name, cards, encoding_spec="png"):
+    """
+    Run one benchmark case in this process and return its result row.
+    export_png writes cards in the ImageEncoding encoding_spec and adds the
+    mean file size to the row.
+    """
+    from PyQt6.QtGui import QPageSize
+
+    if benchmark == "update_card_data_table":
+        from PyQt6.QtWidgets import QApplication
+        app = QApplication.instance() or QApplication([sys.argv[0]])
+    else:
+        from PyQt6.QtGui import QGuiApplication
+        app = QGuiApplication.instance() or QGuiApplication([sys.argv[0]])
+
+    import cardexport
+    from cardrenderer import CardRenderer
+
+    template = synthetic_template(template_name)
+    deck = synthetic_deck(cards)
+    renderer = CardRenderer(template)
+
+    if benchmark == "render_card":
+        latencies = []
+        start = time.perf_counter()
+        for card in deck:
+            card_start = time.perf_counter()
+            renderer.image_pool.release(renderer.render_card(card))  # Handed back like exports do
+            latencies.append(time.perf_counter() - card_start)
+        return summarize(benchmark, template_name, cards, time.perf_counter() - start, latencies)
+
+    if benchmark in ("export_png", "export_pdf"):
+        with tempfile.TemporaryDirectory() as dir_name:
+            recorder = LatencyRecorder()
+            start = time.perf_counter()
+            if benchmark == "export_png":
+                encoding = cardexport.ImageEncoding.parse(encoding_spec)
+                cardexport.export_png(renderer, deck, dir_name, progress=recorder, encoding=encoding)
+            else:
+                page_size = QPageSize(cardexport.PDF_PAGE_SIZES["A4"])
+                file_name = os.path.join(dir_name, "cards.pdf")
+                cardexport.export_pdf(renderer, deck, file_name, page_size, vector=True, progress=recorder)
+            seconds = time.perf_counter() - start
+            size = sum(entry.stat().st_size for entry in os.scandir(dir_name))
+        result = summarize(benchmark, template_name, cards, seconds, recorder.latencies)
+        if benchmark == "export_png":
+            result["encoding"] = encoding.describe()
+            result["kb_per_card"] = size / 1024 / cards if cards else None
+        return result
+
+    if benchmark == "update_card_data_table":
+        import cardmaker
+        from carddata import CardDataStore
+
+        window = cardmaker.CardMaker()
+        window.template = template
+        store = CardDataStore.from_rows(deck)
+        latencies = []
+        for _ in range(TABLE_UPDATE_RUNS):
+            window.card_data = store
+            call_start = time.perf_counter()
+            window.update_card_data_table()
+            latencies.append(time.perf_counter() - call_start)
+        result = summarize(benchmark, template_name, cards, sum(latencies), latencies)
+        result["cards_per_second"] = cards / statistics.median(latencies)  # Rows loaded per second
+        return result
+
+    raise ValueError(f"Unknown benchmark {benchmark}")
+
+
+def startup_result(runs):
+    previews = time_startup(runs)["first preview"]
+    result = summarize("startup", "demo", None, statistics.median(previews), previews)
+    result["peak_rss_mb"] = None  # Measured here, not in the interpreters that started up
+    return result
+
+
+def run_suite(benchmarks, templates, sizes, startup_runs=DEFAULT_STARTUP_RUNS, encodings=DEFAULT_ENCODINGS):
+    """
+    Run every case in a fresh interpreter, printing each row as it finishes.
+    export_png runs once per encoding spec.
+    """
+    results = []
+    print_header()
+    for benchmark in benchmarks:
+        if benchmark == "startup":
+            result = startup_result(startup_runs)
+            print_row(result)
+            results.append(result)
+            continue
+        # The data table does not depend on the template
+        for template in templates[:1] if benchmark == "update_card_data_table" else templates:
+            for size in sizes:
+                for encoding in encodings if benchmark == "export_png" else encodings[:1]:
+                    output = run_python([
+                        os.path.abspath(__file__), "case", benchmark, template, str(size), "--encoding", encoding
+                    ])
+                    result = json.loads(output.stdout.splitlines()[-1])
+                    print_row(result)
+                    results.append(result)
+    return results
+
+
+def print_header():
+    print(
+        f"{'benchmark':<24} {'template':<8} {'cards':>6} {'total s':>9} {'cards/s':>9} "
+        f"{'p50 ms':>8} {'p95 ms':>8} {'RSS MB':>8} {'KB/card':>8}  encoding"
+    )
+
+
+def print_row(result):
+    def number(value, digits):
+        return f"{value:.{digits}f}" if value is not None else "n/a"
+
+    print(
+        f"{result['benchmark']:<24} {result['template']:<8} {result['cards'] or '':>6} "
+        f"{number(result['seconds'], 3):>9} {number(result['cards_per_second'], 1):>9} "
+        f"{number(result['p50_ms'], 2):>8} {number(result['p95_ms'], 2):>8} "
+        f"{number(result['peak_rss_mb'], 1):>8} {number(result.get('kb_per_card'), 1):>8}  "
+        f"{result.get('encoding', '')}",
+        flush=True,
+    )
+
+
+def add_suite_arguments(parser, with_defaults=True):
+    """
+    Add the suite options. Without defaults, options left out are not set at
+    all, so the suite subcommand keeps values given before it.
+    """
+    def default(value):
+        return value if with_defaults else argparse.SUPPRESS
+
+    parser.add_argument("--sizes", type=int, nargs="+", default=default(list(DEFAULT_DECK_SIZES)), help="deck sizes")
+    parser.add_argument("--templates", nargs="+", choices=TEMPLATES, default=default(list(TEMPLATES)))
+    parser.add_argument("--benchmarks", nargs="+", choices=BENCHMARKS, default=default(list(BENCHMARKS)))
+    parser.add_argument("--startup-runs", type=int, default=default(DEFAULT_STARTUP_RUNS))
+    parser.add_argument(
+        "--encodings",
+        nargs="+",
+        default=default(list(DEFAULT_ENCODINGS)),
+        help='export_png encodings, e.g. "png" "png,compression=1,strip_alpha" "jpg,quality=85" "webp"',
+    )
+    parser.add_argument("--json", metavar="FILE", default=default(None), help="also write the results to FILE")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="CardMaker performance benchmarks.")
+    add_suite_arguments(parser)
+    commands = parser.add_subparsers(dest="command")
+
+    suite = commands.add_parser("suite", help="render synthetic decks (the default command)")
+    add_suite_arguments(suite, with_defaults=False)
+
+    startup = commands.add_parser("startup", help="time cold start and break it down per import")
+    startup.add_argument("--runs", type=int, default=DEFAULT_STARTUP_RUNS)
+    startup.add_argument("--top", type=int, default=DEFAULT_TOP_IMPORTS, help="imports to list")
+
+    # Used by the suite to run one case per interpreter
+    case = commands.add_parser("case")
+    case.add_argument("benchmark", choices=BENCHMARKS[:-1])
+    case.add_argument("template", choices=TEMPLATES)
+    case.add_argument("cards", type=int)
+    case.add_argument("--encoding", default="png")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.command == "startup":
+        benchmark_startup(args.runs, args.top)
+    elif args.command == "case":
+        print(json.dumps(run_case(args.benchmark, args.template, args.cards, args.encoding)))
+    else:
+        results = run_suite(args.benchmarks, args.templates, args.sizes, args.startup_runs, args.encodings)
+        if args.json:
+            with open(args.json, "w") as f:
+                json.dump(results, f, indent=4)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,103 @@
+# carddata.py
+import csv
+from itertools import islice
+
+DEFAULT_CHUNK_SIZE = 1000  # Rows per chunk when reading in batches
+CSV_ENCODING = "utf-8-sig"  # UTF-8 with or without the byte order mark spreadsheet apps write
+
+
+def iter_card_rows(file_name, encoding=CSV_ENCODING):
+    """
+    Yield the rows of a card data CSV one dict at a time, so a deck can be
+    rendered without holding the whole file in memory.
+
+    Values stay strings. Cells missing from short rows become "" and cells
+    beyond the header of long rows are dropped.
+    """
+    with open(file_name, newline="", encoding=encoding) as f:
+        reader = csv.DictReader(f, restval="")
+        for row in reader:
+            row.pop(None, None)
+            yield row
+
+
+def iter_card_chunks(file_name, chunk_size=DEFAULT_CHUNK_SIZE, encoding=CSV_ENCODING):
+    """Yield lists of up to chunk_size card rows"""
+    rows = iter_card_rows(file_name, encoding)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class CardDataStore:
+    """
+    Card rows kept column by column.
+
+    Indexing returns a row as a dict, so the store stands in for a list of row
+    dicts wherever cards are rendered, while a single cell is read or replaced
+    in O(1) without touching the rest of the row.
+    """
+
+    def __init__(self, columns=()):
+        self.columns = list(columns)
+        self._values = [[] for _ in self.columns]
+        self._row_count = 0
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Build a store from row dicts, the columns are the keys of the first row"""
+        rows = iter(rows)
+        first = next(rows, None)
+        if first is None:
+            return cls()
+        store = cls(first.keys())
+        store.append(first)
+        for row in rows:
+            store.append(row)
+        return store
+
+    @classmethod
+    def from_csv(cls, file_name, encoding=CSV_ENCODING):
+        return cls.from_rows(iter_card_rows(file_name, encoding))
+
+    def append(self, row):
+        for name, values in zip(self.columns, self._values):
+            values.append(row.get(name, ""))
+        self._row_count += 1
+
+    def value(self, row, column):
+        return self._values[column][row]
+
+    def set_value(self, row, column, value):
+        self._values[column][row] = value
+
+    def column_index(self, name):
+        return self.columns.index(name)
+
+    def write_csv(self, file_name, encoding="utf-8"):
+        """
+        Write the rows as a CSV, in UTF-8 without a byte order mark by default.
+        The readers take files with or without one, so what is written reads back the same.
+        """
+        with open(file_name, "w", newline="", encoding=encoding) as f:
+            writer = csv.writer(f)
+            writer.writerow(self.columns)
+            writer.writerows(zip(*self._values))
+
+    def __len__(self):
+        return self._row_count
+
+    def __getitem__(self, row):
+        if isinstance(row, slice):
+            return [self[i] for i in range(*row.indices(self._row_count))]
+        if row < 0:
+            row += self._row_count
+        if not 0 <= row < self._row_count:
+            raise IndexError("card row out of range")
+        return {name: values[row] for name, values in zip(self.columns, self._values)}
+
+    def __iter__(self):
+        for row in range(self._row_count):
+            yield self[row]
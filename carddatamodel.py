@@ -0,0 +1,56 @@
+# carddatamodel.py
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex
+
+from carddata import CardDataStore
+
+
+class CardDataModel(QAbstractTableModel):
+    """
+    Table model reading cells straight from a CardDataStore.
+
+    Views only ask for the cells they show, and an edit writes one cell of the
+    store and emits dataChanged for that cell alone.
+    """
+
+    def __init__(self, store=None, parent=None):
+        super().__init__(parent)
+        self.store = store if store is not None else CardDataStore()
+
+    def set_store(self, store):
+        self.beginResetModel()
+        self.store = store
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.store)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.store.columns)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        if role in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.EditRole):
+            return str(self.store.value(index.row(), index.column()))
+        return None
+
+    def setData(self, index, value, role=Qt.ItemDataRole.EditRole):
+        if not index.isValid() or role != Qt.ItemDataRole.EditRole:
+            return False
+        if self.store.value(index.row(), index.column()) == value:
+            return False
+        self.store.set_value(index.row(), index.column(), value)
+        self.dataChanged.emit(index, index, [Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.EditRole])
+        return True
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == Qt.Orientation.Horizontal:
+            return self.store.columns[section]
+        return str(section + 1)
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.ItemFlag.NoItemFlags
+        return Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable | Qt.ItemFlag.ItemIsEditable
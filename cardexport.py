@@ -0,0 +1,575 @@
+# cardexport.py
+import json
+import math
+import os
+from itertools import islice
+from operator import itemgetter
+
+from PyQt6.QtCore import Qt, QBuffer, QByteArray, QIODevice, QMarginsF, QRectF
+from PyQt6.QtGui import QImage, QImageWriter, QPainter, QPdfWriter, QPageSize
+
+from decodepool import prefetch_illustrations
+from exportwriter import BackgroundWriter, StreamedFile
+from imagepool import ImagePool
+from imposition import ATLAS_COLUMNS, ATLAS_ROWS, PRINT_DPI, AtlasLayout, SheetLayout
+from rendercache import store_render
+import renderprofiler
+
+PDF_PAGE_SIZES = {
+    "A4": QPageSize.PageSizeId.A4,
+    "A3": QPageSize.PageSizeId.A3,
+    "B4": QPageSize.PageSizeId.B4,
+    "B3": QPageSize.PageSizeId.B3,
+    "Custom": None,
+}
+CHUNKS_PER_WORKER = 4  # Smaller chunks keep workers busy and progress reports frequent
+CHUNKS_IN_FLIGHT_PER_WORKER = 2  # Queued chunks per worker when reading cards lazily
+STREAM_CHUNK_SIZE = 64  # Cards per chunk when the deck size is not known up front
+ATLAS_INDEX_FILE = "atlas.json"
+ATLAS_SHEETS_IN_FLIGHT = 2  # The sheet being filled and the one being written, sheets can be hundreds of MB
+MAX_SHEET_SIZES = {"jpg": 65535, "webp": 16383}  # Largest image side the format can store
+
+_worker_app = None  # QGuiApplication of a parallel export worker process
+_worker_renderer = None  # CardRenderer owned by a parallel export worker process
+
+
+def card_png_path(dir_name, index, suffix="png"):
+    return os.path.join(dir_name, f"card_{index + 1}.{suffix}")
+
+
+def atlas_sheet_path(dir_name, index, suffix="png"):
+    return os.path.join(dir_name, f"sheet_{index + 1}.{suffix}")
+
+
+class ImageEncoding:
+    """
+    How export_png encodes cards.
+
+    image_format is one of IMAGE_FORMATS. quality (0-100) applies to JPEG and
+    WebP, compression to PNG (zlib level 0-9, lower is faster and larger) and
+    TIFF (0 none, 1 LZW); -1 keeps Qt's defaults. strip_alpha writes fully
+    opaque cards without an alpha channel. Formats without alpha get
+    transparent areas flattened onto white.
+    """
+
+    def __init__(self, image_format="png", quality=-1, compression=-1, strip_alpha=False):
+        if image_format not in IMAGE_FORMATS:
+            raise ValueError(f"Unsupported image format {image_format}")
+        self.image_format = image_format
+        self.quality = quality
+        self.compression = compression
+        self.strip_alpha = strip_alpha
+
+    @classmethod
+    def parse(cls, spec):
+        """
+        Build an encoding from "format[,quality=N][,compression=N][,strip_alpha]",
+        e.g. "png,compression=1,strip_alpha" or "webp,quality=80".
+        """
+        name, *options = spec.split(",")
+        kwargs = {}
+        for option in options:
+            key, _, value = option.partition("=")
+            if key == "strip_alpha" and not value:
+                kwargs[key] = True
+            elif key in ("quality", "compression") and value.lstrip("-").isdigit():
+                kwargs[key] = int(value)
+            else:
+                raise ValueError(f"Unknown image encoding option {option}")
+        return cls(name.lower(), **kwargs)
+
+    @property
+    def suffix(self):
+        return self.image_format
+
+    def describe(self):
+        options = [self.image_format]
+        if self.quality >= 0:
+            options.append(f"quality={self.quality}")
+        if self.compression >= 0:
+            options.append(f"compression={self.compression}")
+        if self.strip_alpha:
+            options.append("strip_alpha")
+        return ",".join(options)
+
+    def encode(self, image):
+        """Return the bytes of image in this encoding"""
+        qt_format, keeps_alpha = IMAGE_FORMATS[self.image_format]
+        if (self.strip_alpha or not keeps_alpha) and image.hasAlphaChannel():
+            if is_opaque(image):
+                image = image.convertToFormat(QImage.Format.Format_RGB888)
+            elif not keeps_alpha:
+                image = flatten_on_white(image)
+
+        data = QByteArray()
+        buffer = QBuffer(data)
+        buffer.open(QIODevice.OpenModeFlag.WriteOnly)
+        writer = QImageWriter(buffer, qt_format)
+        if self.image_format == "png":
+            if self.compression >= 0:
+                # Qt maps PNG quality 100..0 onto zlib levels 0..9
+                writer.setQuality(100 - math.ceil(min(self.compression, 9) * 91 / 9))
+        elif self.image_format == "tiff":
+            if self.compression >= 0:
+                writer.setCompression(self.compression)
+        else:
+            writer.setQuality(self.quality)
+        if not writer.write(image):
+            raise OSError(f"Failed to encode a card as {self.image_format}: {writer.errorString()}")
+        return data.data()
+
+
+IMAGE_FORMATS = {  # name -> (Qt format, keeps alpha)
+    "png": (b"png", True),
+    "jpg": (b"jpeg", False),
+    "webp": (b"webp", True),
+    "tiff": (b"tiff", True),
+}
+DEFAULT_ENCODING = ImageEncoding()
+
+
+def is_opaque(image):
+    """True if no pixel of image is even partly transparent"""
+    if not image.hasAlphaChannel():
+        return True
+    alpha = image.convertToFormat(QImage.Format.Format_Alpha8)
+    data = alpha.constBits().asstring(alpha.sizeInBytes())
+    line = alpha.bytesPerLine()
+    if line != alpha.width():  # Skip the padding at the end of each row
+        data = b"".join(data[row:row + alpha.width()] for row in range(0, len(data), line))
+    return not data.strip(b"\xff")
+
+
+def flatten_on_white(image):
+    flat = QImage(image.size(), QImage.Format.Format_RGB888)
+    flat.fill(Qt.GlobalColor.white)
+    painter = QPainter(flat)
+    painter.drawImage(0, 0, image)
+    painter.end()
+    return flat
+
+
+def write_file(path, data):
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def export_png(
+    renderer, cards, dir_name, first_index=0, progress=None, cancelled=None, cache=None, encoding=DEFAULT_ENCODING
+):
+    """
+    Render every card and save it as card_<n>.png in dir_name, returns the card count.
+
+    first_index numbers the files of a deck chunk, progress(done) is called after
+    each card is written and the loop stops early once cancelled() returns True.
+    With a rendercache.RenderCache only cards whose inputs changed are rendered.
+    An ImageEncoding picks another file format (and suffix) or encoder settings.
+    Cards are encoded and written on a BackgroundWriter thread while the next
+    ones render, progress is called from that thread.
+    """
+    count = 0
+
+    def write_card(image, path, key):
+        nonlocal count
+        if image is not None:
+            save_card(renderer, image, path, encoding, cache, key)
+            renderer.image_pool.release(image)  # The next card renders into it
+        count += 1
+        if progress:
+            progress(count)
+
+    def card_to_render(item):
+        i, card = item
+        if cache is not None and cache.holds(card_png_path(dir_name, i, encoding.suffix), cache.card_key(card)):
+            return None  # No illustration to decode for a card the cache already holds
+        return card
+
+    writer = BackgroundWriter()
+    try:
+        for i, card in prefetch_illustrations(renderer, enumerate(cards, first_index), card_to_render):
+            if cancelled and cancelled():
+                break
+            path = card_png_path(dir_name, i, encoding.suffix)
+            key = cache.card_key(card) if cache is not None else None
+            image = None
+            if key is None or not cache.reuse(path, key):
+                image = renderer.render_card(card)
+            writer.submit(write_card, image, path, key)
+    finally:
+        writer.close()
+    return count
+
+
+def save_card(renderer, image, path, encoding, cache=None, key=None):
+    """Encode a rendered card and write it to path, through cache when the card has a key"""
+    with renderer.stage(renderprofiler.ENCODE):
+        data = encoding.encode(image)
+    with renderer.stage(renderprofiler.WRITE):
+        if key is None:
+            write_file(path, data)
+        else:
+            cache.store(data, path, key)
+
+
+def export_atlas(
+    renderer,
+    cards,
+    dir_name,
+    columns=ATLAS_COLUMNS,
+    rows=ATLAS_ROWS,
+    scale=1.0,
+    max_sheet_size=None,
+    include_bleed=False,
+    encoding=DEFAULT_ENCODING,
+    progress=None,
+    cancelled=None,
+):
+    """
+    Render cards as tiles of sheet_<n>.png atlas images in dir_name, for
+    digital tabletop decks, returns the card count.
+
+    Each sheet holds a columns x rows grid of cards rendered at scale, fewer
+    when a sheet would be larger than max_sheet_size pixels on either side,
+    than its format can store or than imposition.MAX_SHEET_BYTES.
+    atlas.json lists the sheets and the sheet and pixel rectangle of every
+    card. Full sheets are encoded and written on a BackgroundWriter thread
+    while the next one fills; progress(done) is called as cards are placed
+    and cancelled works as for export_png.
+    """
+    width, height, scale = renderer.card_geometry(include_bleed, scale)
+    format_limit = MAX_SHEET_SIZES.get(encoding.image_format)
+    if format_limit:
+        max_sheet_size = min(max_sheet_size or format_limit, format_limit)
+    layout = AtlasLayout(width, height, columns, rows, scale, max_sheet_size)
+    if not layout.cards_per_sheet:
+        raise ValueError(
+            f"A {layout.tile_width}x{layout.tile_height} card tile does not fit on an atlas sheet "
+            "of the maximum size, use a smaller tile scale"
+        )
+
+    index = {
+        "columns": layout.columns,
+        "rows": layout.rows,
+        "tile_width": layout.tile_width,
+        "tile_height": layout.tile_height,
+        "sheets": [],
+        "cards": [],
+    }
+    sheets = ImagePool(ATLAS_SHEETS_IN_FLIGHT)
+    painter = None
+    count = 0
+
+    def write_sheet(image, path):
+        save_card(renderer, image, path, encoding)
+        sheets.release(image)
+
+    def finish_sheet(sheet, path, cards_on_sheet):
+        painter.end()
+        index["sheets"].append({"file": os.path.basename(path), "cards": cards_on_sheet})
+        # The previous sheet is written first, so the next one reuses its image and no more than two are alive
+        writer.wait()
+        writer.submit(write_sheet, sheet, path)
+
+    writer = BackgroundWriter(max_pending=1)
+    try:
+        for card in prefetch_illustrations(renderer, cards, include_bleed=include_bleed, scale=scale):
+            if cancelled and cancelled():
+                break
+            sheet_index, slot = divmod(count, layout.cards_per_sheet)
+            if slot == 0:
+                path = atlas_sheet_path(dir_name, sheet_index, encoding.suffix)
+                sheet = sheets.acquire(layout.sheet_width, layout.sheet_height)
+                if sheet.isNull():
+                    raise ValueError(f"Out of memory for a {layout.sheet_width}x{layout.sheet_height} atlas sheet")
+                sheet.fill(Qt.GlobalColor.transparent)
+                painter = QPainter(sheet)
+                # Tiles replace the pixels under them, a plain copy
+                painter.setCompositionMode(QPainter.CompositionMode.CompositionMode_Source)
+
+            image = renderer.render_card(card, include_bleed=include_bleed, scale=scale)
+            x, y = layout.tile_position(slot)
+            with renderer.stage(renderprofiler.PIXMAP_DRAW, "atlas tile"):
+                painter.drawImage(x, y, image)
+            index["cards"].append(
+                {"file": os.path.basename(path), "x": x, "y": y, "width": image.width(), "height": image.height()}
+            )
+            renderer.image_pool.release(image)
+            count += 1
+            if progress:
+                progress(count)
+            if slot == layout.cards_per_sheet - 1:
+                finish_sheet(sheet, path, slot + 1)
+
+        if painter is not None and painter.isActive():
+            finish_sheet(sheet, path, count % layout.cards_per_sheet)
+    finally:
+        if painter is not None and painter.isActive():
+            painter.end()  # Stopped by an error, the sheet is dropped
+        writer.close()
+
+    with open(os.path.join(dir_name, ATLAS_INDEX_FILE), "w") as f:
+        json.dump(index, f, indent=4)
+    return count
+
+
+def default_worker_count():
+    return os.cpu_count() or 1
+
+
+def export_png_parallel(
+    template,
+    cards,
+    dir_name,
+    workers=None,
+    chunk_size=None,
+    progress=None,
+    cache=None,
+    encoding=DEFAULT_ENCODING,
+    svg_cache_dir=None,
+):
+    """
+    Render and encode cards as card_<n>.png on a pool of worker processes.
+
+    Each worker loads the template once and keeps its own asset cache warm for
+    all chunks it is given. cards may be a list or any iterable such as
+    carddata.iter_card_rows; it is consumed one chunk at a time and only a few
+    chunks per worker are in flight, so memory stays flat for any deck size.
+    progress(done, total) is called in this process as chunks finish, total is
+    None when cards has no length. cache and encoding are as for export_png,
+    cards the cache already holds never reach the workers. With svg_cache_dir
+    workers share a svgraster.SvgRasterCache there. Returns the card count.
+    """
+    total = len(cards) if hasattr(cards, "__len__") else None
+    if total == 0:
+        return 0
+
+    workers = max(1, workers or default_worker_count())
+    if total is not None:
+        workers = min(workers, total)
+    if chunk_size is None:
+        if total is None:
+            chunk_size = STREAM_CHUNK_SIZE
+        else:
+            chunk_size = max(1, math.ceil(total / (workers * CHUNKS_PER_WORKER)))
+
+    # Imported here, the process pool machinery is only needed by parallel exports
+    import multiprocessing
+    from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+    rows = iter(cards)
+    done = 0
+    start = 0
+    pending = {}  # future -> (path, key) of each card it renders
+
+    # Qt state must not be forked, so every worker starts from a fresh interpreter
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=context,
+        initializer=_init_png_worker,
+        initargs=(template.to_dict(), svg_cache_dir),
+    ) as pool:
+        while True:
+            while len(pending) < workers * CHUNKS_IN_FLIGHT_PER_WORKER:
+                chunk = list(islice(rows, chunk_size))
+                if not chunk:
+                    break
+                items = []
+                for i, card in enumerate(chunk, start):
+                    path = card_png_path(dir_name, i, encoding.suffix)
+                    key = cache.card_key(card) if cache is not None else None
+                    if key is not None and cache.reuse(path, key):
+                        done += 1
+                    else:
+                        items.append((path, card, key))
+                start += len(chunk)
+                if items:
+                    cache_dir = cache.cache_dir if cache is not None else None
+                    future = pool.submit(_export_png_items, items, cache_dir, encoding)
+                    pending[future] = [(path, key) for path, _, key in items]
+                elif progress:
+                    progress(done, total)
+            if not pending:
+                break
+
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                done += future.result()
+                rendered = pending.pop(future)
+                if cache is not None:
+                    for path, key in rendered:
+                        cache.record(path, key)
+                if progress:
+                    progress(done, total)
+    return done
+
+
+def _init_png_worker(template_data, svg_cache_dir=None):
+    global _worker_renderer, _worker_app
+
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt6.QtGui import QGuiApplication
+    from cardtemplate import CardTemplate
+    from cardrenderer import CardRenderer
+
+    _worker_app = QGuiApplication.instance() or QGuiApplication(["cardexport-worker"])
+    _worker_renderer = CardRenderer(CardTemplate(template_data))
+    if svg_cache_dir:
+        from svgraster import SvgRasterCache
+        _worker_renderer.svg_rasters = SvgRasterCache(svg_cache_dir, _worker_renderer.asset_cache)
+
+
+def _export_png_items(items, cache_dir, encoding):
+    writer = BackgroundWriter()
+    try:
+        for path, card, key in prefetch_illustrations(_worker_renderer, items, itemgetter(1)):
+            writer.submit(_write_png_item, _worker_renderer.render_card(card), path, key, cache_dir, encoding)
+    finally:
+        writer.close()
+    return len(items)
+
+
+def _write_png_item(image, path, key, cache_dir, encoding):
+    data = encoding.encode(image)
+    _worker_renderer.image_pool.release(image)
+    if key is None:
+        write_file(path, data)
+    else:
+        store_render(data, cache_dir, key, path)
+
+
+def draw_pdf_card(painter, renderer, card, rect, vector=False):
+    """
+    Draw a card with bleed into rect of a PDF page. vector paints layers and text
+    directly instead of embedding a rasterized card.
+    """
+    if vector:
+        painter.save()
+        painter.translate(rect.topLeft())
+        with renderer.stage(renderprofiler.CARD):
+            renderer.paint_card(painter, card, include_bleed=True)
+        painter.restore()
+    else:
+        image = renderer.render_card(card, include_bleed=True)
+        with renderer.stage(renderprofiler.PIXMAP_DRAW, "PDF card"):
+            painter.drawImage(rect, image)
+        renderer.image_pool.release(image)  # The page holds the encoded pixels
+
+
+def export_pdf(renderer, cards, file_name, page_size, vector=False, progress=None, cancelled=None):
+    """
+    Render every card with bleed onto its own page of a PDF, returns the card count.
+
+    progress and cancelled work as for export_png; a cancelled PDF keeps the
+    pages written so far. Each finished page is written to disk through a
+    StreamedFile while the next cards render.
+    """
+    output = StreamedFile(file_name)
+    writer = QPdfWriter(output.device)
+    writer.setPageSize(page_size)
+
+    # Set page margins to zero
+    margins = QMarginsF(0, 0, 0, 0)
+    writer.setPageMargins(margins)
+    writer.setResolution(PRINT_DPI)  # One card pixel per device pixel
+    template = renderer.template
+    card_rect = QRectF(0, 0, template.width + 2 * template.bleed, template.height + 2 * template.bleed)
+
+    painter = QPainter(writer)
+    count = 0
+    try:
+        for card in prefetch_illustrations(renderer, cards, include_bleed=True):
+            if cancelled and cancelled():
+                break
+            if count:  # Don't add a new page after the last card
+                writer.newPage()
+            draw_pdf_card(painter, renderer, card, card_rect, vector)
+            output.flush()
+            count += 1
+            if progress:
+                progress(count)
+    finally:
+        finish_pdf(renderer, painter, output, file_name)
+    return count
+
+
+def finish_pdf(renderer, painter, output, file_name):
+    with renderer.stage(renderprofiler.WRITE, file_name):
+        painter.end()
+        output.close()
+
+
+def export_pdf_sheets(
+    renderer,
+    cards,
+    file_name,
+    page_size,
+    gutter=0,
+    crop_marks=True,
+    back_path=None,
+    vector=False,
+    progress=None,
+    cancelled=None,
+):
+    """
+    Impose cards on PDF sheets as a grid sized from the page, card and bleed,
+    returns the card count.
+
+    gutter is the space between cards in card pixels. With back_path every
+    sheet of fronts is followed by a sheet of backs mirrored for long-edge
+    duplex printing. vector is as for draw_pdf_card, progress and cancelled
+    work as for export_png.
+    """
+    template = renderer.template
+    layout = SheetLayout(page_size, template.width, template.height, template.bleed, gutter, crop_marks)
+    if not layout.cards_per_sheet:
+        raise ValueError("The card with bleed does not fit on the selected page size")
+
+    back_image = renderer.render_back(back_path) if back_path else None
+
+    output = StreamedFile(file_name)
+    writer = QPdfWriter(output.device)
+    writer.setPageSize(page_size)
+    writer.setPageMargins(QMarginsF(0, 0, 0, 0))
+    writer.setResolution(layout.dpi)  # One card pixel per device pixel
+
+    painter = QPainter(writer)
+    pages = 0
+    slots_used = 0
+    count = 0
+
+    def start_page():
+        nonlocal pages
+        if pages:
+            writer.newPage()
+        pages += 1
+
+    def finish_sheet():
+        layout.draw_crop_marks(painter)
+        if back_image is not None:
+            start_page()
+            for slot in range(slots_used):
+                painter.drawImage(layout.slot_rect(slot, back=True), back_image)
+            layout.draw_crop_marks(painter)
+
+    try:
+        for card in prefetch_illustrations(renderer, cards, include_bleed=True):
+            if cancelled and cancelled():
+                break
+            if slots_used == 0:
+                start_page()
+            draw_pdf_card(painter, renderer, card, layout.slot_rect(slots_used), vector)
+            output.flush()
+            slots_used += 1
+            count += 1
+            if progress:
+                progress(count)
+            if slots_used == layout.cards_per_sheet:
+                finish_sheet()
+                slots_used = 0
+
+        if slots_used:
+            finish_sheet()
+    finally:
+        finish_pdf(renderer, painter, output, file_name)
+    return count
@@ -1,6 +1,12 @@
 import sys
 import csv
-import pandas as pd
+
+if __name__ == "__main__" and len(sys.argv) > 1 and sys.argv[1] == "render":
+    # Headless runs dispatch before the widget set is imported
+    from batchrender import main
+
+    sys.exit(main(sys.argv[2:]))
+
 from PyQt6.QtWidgets import (
     QApplication,
     QMainWindow,
@@ -9,6 +15,7 @@ from PyQt6.QtWidgets import (
     QLabel,
     QTableWidget,
     QTableWidgetItem,
+    QTableView,
     QSpinBox,
     QComboBox,
     QInputDialog,
@@ -23,30 +30,37 @@ from PyQt6.QtWidgets import (
     QInputDialog,
     QHeaderView,
 )
-from PyQt6.QtCore import Qt, QSizeF, QPointF, QMarginsF, QRectF, QEvent
+from PyQt6.QtCore import Qt, QSizeF, QEvent, QThreadPool, QTimer
 from PyQt6.QtGui import (
-    QImage,
-    QPainter,
     QPixmap,
-    QPdfWriter,
-    QFont,
-    QColor,
     QPageSize,
     QDropEvent,
 )
-from PyQt6.QtSvg import QSvgRenderer
+import copy
+from collections import OrderedDict
 import json
 from cardtemplate import CardTemplate  # Import the CardTemplate class
+from renderplan import ordered_layers
+from assetcache import AssetCache
+from cardrenderer import CardRenderer, LiveCardRenderer
+import cardexport
+from carddata import CardDataStore
+from carddatamodel import CardDataModel
+import renderjobs
+from rendercache import RenderCache
+from renderprofiler import RenderProfiler
+from cardexport import IMAGE_FORMATS, PDF_PAGE_SIZES, ImageEncoding
 
 DEMO_CSV_FILE = "demo_data.csv"
 DEMO_TEMPLATE_FILE = "demo_template.json"
-PDF_PAGE_SIZES = {
-    "A4": QPageSize.PageSizeId.A4,
-    "A3": QPageSize.PageSizeId.A3,
-    "B4": QPageSize.PageSizeId.B4,
-    "B3": QPageSize.PageSizeId.B3,
-    "Custom": None,
-}
+DEMO_CARD_BACK_FILE = "card_back.svg"
+DATA_TABLE_RESIZE_SAMPLE_ROWS = 100  # Rows measured when fitting card data columns
+PREVIEW_CACHE_SIZE = 24  # Preview pixmaps kept for quick navigation
+PREVIEW_PREFETCH_OFFSETS = (1, -1, 2, -2)  # Cards rendered ahead around the current one
+PREVIEW_THREADS = 2
+PREVIEW_PRIORITY = 1  # The card on screen is rendered before any prefetch
+PREFETCH_PRIORITY = 0
+RENDER_STATS_ROWS = 12  # Slowest stages listed in the render stats table
 
 class CardMaker(QMainWindow):
     def __init__(self):
@@ -57,9 +71,21 @@ class CardMaker(QMainWindow):
         # Initialize attributes first
         self.demo_data_loaded = False
         self.template = None
-        self.card_data = []
+        self.card_data = CardDataStore()
         self.current_card_index = 0
-        self._image_cache = {}  # Add image caching
+        self.asset_cache = AssetCache()  # Shared by every render path
+        self.renderer = CardRenderer(asset_cache=self.asset_cache)
+        self.live_renderer = LiveCardRenderer(self.renderer)  # Repaints only edited fields of the shown card
+        self.profiler = RenderProfiler()  # Used by renders while Profile Renders is checked
+        self.export_pool = QThreadPool(self)
+        self.preview_pool = QThreadPool(self)
+        self.preview_pool.setMaxThreadCount(PREVIEW_THREADS)
+        self._export_job = None
+        self._preview_jobs = {}  # (card index, template revision) -> RenderJob
+        self._preview_cache = OrderedDict()  # (card index, template revision) -> preview QPixmap
+        self._template_signature = None
+        self._template_revision = 0
+        self._layers_table_rows = []  # Values shown in the layers table, one tuple per row
 
         # Create main widget and layout
         main_widget = QWidget()
@@ -184,11 +210,13 @@ class CardMaker(QMainWindow):
         left_layout.addWidget(card_data_group)
 
         # Card data table
-        self.card_data_table = QTableWidget()
-        self.card_data_table.setColumnCount(1)
-        self.card_data_table.setHorizontalHeaderLabels(["Card Data"])
-        self.card_data_table.cellChanged.connect(self.card_data_table_cell_changed)
-        self.card_data_table.cellDoubleClicked.connect(self.open_image_selector)
+        self.card_data_model = CardDataModel(self.card_data, self)
+        self.card_data_model.dataChanged.connect(self.card_data_changed)
+        self.card_data_table = QTableView()
+        self.card_data_table.setModel(self.card_data_model)
+        # Size columns from a sample of rows instead of measuring every cell
+        self.card_data_table.horizontalHeader().setResizeContentsPrecision(DATA_TABLE_RESIZE_SAMPLE_ROWS)
+        self.card_data_table.doubleClicked.connect(lambda index: self.open_image_selector(index.row(), index.column()))
         left_layout.addWidget(self.card_data_table)
 
         # PDF page size controls
@@ -223,6 +251,33 @@ class CardMaker(QMainWindow):
 
         left_layout.addWidget(pdf_page_size_group)
 
+        # PDF imposition controls
+        imposition_group = QWidget()
+        imposition_layout = QHBoxLayout()
+        imposition_group.setLayout(imposition_layout)
+
+        self.impose_pdf_check = QCheckBox("Multiple cards per sheet")
+        imposition_layout.addWidget(self.impose_pdf_check)
+
+        self.pdf_gutter_spin = QSpinBox()
+        self.pdf_gutter_spin.setRange(0, 300)
+        self.pdf_gutter_spin.setValue(0)
+        imposition_layout.addWidget(QLabel("Gutter:"))
+        imposition_layout.addWidget(self.pdf_gutter_spin)
+
+        self.crop_marks_check = QCheckBox("Crop marks")
+        self.crop_marks_check.setChecked(True)
+        imposition_layout.addWidget(self.crop_marks_check)
+
+        self.duplex_backs_check = QCheckBox("Duplex backs")
+        imposition_layout.addWidget(self.duplex_backs_check)
+
+        self.vector_pdf_check = QCheckBox("Vector PDF")
+        self.vector_pdf_check.setChecked(True)
+        imposition_layout.addWidget(self.vector_pdf_check)
+
+        left_layout.addWidget(imposition_group)
+
         # Buttons for card preview, PDF export, etc.
         buttons_group = QWidget()
         buttons_layout = QHBoxLayout()
@@ -238,13 +293,62 @@ class CardMaker(QMainWindow):
         export_pdf_btn.clicked.connect(self.export_pdf)
         buttons_layout.addWidget(export_pdf_btn)
 
-        # Export PNG button
-        export_png_btn = QPushButton("Export PNG")
+        # Export card images button
+        export_png_btn = QPushButton("Export Images")
         export_png_btn.clicked.connect(self.export_png)
         buttons_layout.addWidget(export_png_btn)
 
+        # Cancel a running export
+        self.cancel_export_btn = QPushButton("Cancel Export")
+        self.cancel_export_btn.setEnabled(False)
+        self.cancel_export_btn.clicked.connect(self.cancel_export)
+        buttons_layout.addWidget(self.cancel_export_btn)
+
+        # Render threads for PNG export
+        self.export_workers_spin = QSpinBox()
+        self.export_workers_spin.setRange(1, cardexport.default_worker_count())
+        self.export_workers_spin.setValue(cardexport.default_worker_count())
+        buttons_layout.addWidget(QLabel("Workers:"))
+        buttons_layout.addWidget(self.export_workers_spin)
+
+        # Keep PNGs of cards that have not changed since the last export
+        self.reuse_renders_check = QCheckBox("Skip Unchanged")
+        self.reuse_renders_check.setChecked(True)
+        buttons_layout.addWidget(self.reuse_renders_check)
+
         left_layout.addWidget(buttons_group)
 
+        # Image export format and encoder settings
+        image_options_group = QWidget()
+        image_options_layout = QHBoxLayout()
+        image_options_group.setLayout(image_options_layout)
+
+        self.image_format_combo = QComboBox()
+        self.image_format_combo.addItems(list(IMAGE_FORMATS.keys()))
+        image_options_layout.addWidget(QLabel("Image Format:"))
+        image_options_layout.addWidget(self.image_format_combo)
+
+        # JPEG and WebP quality, -1 keeps the encoder default
+        self.image_quality_spin = QSpinBox()
+        self.image_quality_spin.setRange(-1, 100)
+        self.image_quality_spin.setValue(-1)
+        self.image_quality_spin.setSpecialValueText("Default")
+        image_options_layout.addWidget(QLabel("Quality:"))
+        image_options_layout.addWidget(self.image_quality_spin)
+
+        # PNG zlib level (lower is faster) or TIFF compression
+        self.image_compression_spin = QSpinBox()
+        self.image_compression_spin.setRange(-1, 9)
+        self.image_compression_spin.setValue(-1)
+        self.image_compression_spin.setSpecialValueText("Default")
+        image_options_layout.addWidget(QLabel("Compression:"))
+        image_options_layout.addWidget(self.image_compression_spin)
+
+        self.strip_alpha_check = QCheckBox("Strip Alpha")
+        image_options_layout.addWidget(self.strip_alpha_check)
+
+        left_layout.addWidget(image_options_group)
+
         # Navigation buttons
         nav_buttons_group = QWidget()
         nav_buttons_layout = QHBoxLayout()
@@ -289,128 +393,59 @@ class CardMaker(QMainWindow):
         )
         right_layout.addWidget(resolution_info_label)
 
+        # Render stage timings, collected while profiling is on
+        stats_buttons_group = QWidget()
+        stats_buttons_layout = QHBoxLayout()
+        stats_buttons_group.setLayout(stats_buttons_layout)
+        self.profile_renders_check = QCheckBox("Profile Renders")
+        self.profile_renders_check.stateChanged.connect(self.toggle_render_profiling)
+        stats_buttons_layout.addWidget(self.profile_renders_check)
+        refresh_stats_btn = QPushButton("Refresh")
+        refresh_stats_btn.clicked.connect(self.update_render_stats)
+        stats_buttons_layout.addWidget(refresh_stats_btn)
+        reset_stats_btn = QPushButton("Reset")
+        reset_stats_btn.clicked.connect(self.reset_render_stats)
+        stats_buttons_layout.addWidget(reset_stats_btn)
+        save_stats_btn = QPushButton("Save Stats")
+        save_stats_btn.clicked.connect(self.save_render_stats)
+        stats_buttons_layout.addWidget(save_stats_btn)
+        save_trace_btn = QPushButton("Save Trace")
+        save_trace_btn.clicked.connect(self.save_render_trace)
+        stats_buttons_layout.addWidget(save_trace_btn)
+        right_layout.addWidget(stats_buttons_group)
+
+        self.render_stats_table = QTableWidget(0, 5)
+        self.render_stats_table.setHorizontalHeaderLabels(["Stage", "Layer / Field", "Count", "Total ms", "Mean ms"])
+        self.render_stats_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.render_stats_table.horizontalHeader().setSectionResizeMode(1, QHeaderView.ResizeMode.Stretch)
+        right_layout.addWidget(self.render_stats_table)
+
         main_layout.addWidget(right_column)
 
-        # Initialize template and demo data
+        # Initialize the template now and the demo data once the window is up
         self.template = CardTemplate({})
-        self.load_demo_data()
+        QTimer.singleShot(0, self.load_demo_data)
 
-    def card_data_table_cell_changed(self, row, column):
-        self.update_card_data_from_table()
-        self.update_layers_table()
+    def card_data_changed(self, top_left, bottom_right, roles=()):
+        # The model has already written the edit into self.card_data
+        self.invalidate_previews(top_left.row(), bottom_right.row())
+        if top_left.row() <= self.current_card_index <= bottom_right.row():
+            self.update_preview()
 
     def open_image_selector(self, row, column):
-        if column == self.card_data_table.columnCount() - 1:  # Assuming the last column is for the image path
+        if column == self.card_data_model.columnCount() - 1:  # Assuming the last column is for the image path
             file_name, _ = QFileDialog.getOpenFileName(
                 self, "Select Image", "", "Image files (*.png *.jpg *.jpeg)"
             )
             if file_name:
-                self.card_data_table.setItem(row, column, QTableWidgetItem(file_name))
-                self.update_card_data_from_table()
-                self.update_card_preview()
-        # Update card preview and layers_table with the new image path
-        self.update_card_preview()
-        self.update_layers_table()
-
-    def update_layers_table(self, card_data=None):
-        """
-        Single implementation of update_layers_table with proper error handling
-        """
-        try:
-            if card_data is None:
-                if not self.card_data or self.current_card_index >= len(self.card_data):
-                    return
-                card_data = self.card_data[self.current_card_index]
-
-            self.layers_table.setUpdatesEnabled(False)  # Prevent multiple redraws
-            try:
-                self.layers_table.setRowCount(0)
-                for i, card in enumerate(self.card_data):
-                    self._add_layer_row(i, card)
-            finally:
-                self.layers_table.setUpdatesEnabled(True)
-
-        except Exception as e:
-            QMessageBox.warning(self, "Error", f"Failed to update layers table: {str(e)}")
-
-    def _add_layer_row(self, row_index, card_data):
-        """Helper method to add a single row to layers table"""
-        self.layers_table.insertRow(row_index)
-
-        # Validate positions
-        try:
-            pos_x = float(card_data.get("Position X", 0))
-            pos_y = float(card_data.get("Position Y", 0))
-        except (ValueError, TypeError):
-            pos_x = pos_y = 0
-
-        # Create and set table items with proper validation
-        items = [
-            (card_data.get("Illustration", ""), Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsEditable),
-            ("image", Qt.ItemFlag.ItemIsEnabled),
-            (str(pos_x), Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsEditable),
-            (str(pos_y), Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsEditable),
-            (str(row_index), Qt.ItemFlag.ItemIsEnabled),
-            ("True", Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsEditable)
-        ]
-
-        for col, (value, flags) in enumerate(items):
-            item = QTableWidgetItem(value)
-            item.setFlags(flags)
-            self.layers_table.setItem(row_index, col, item)
-
-        move_up_btn = QPushButton("Up")
-        move_up_btn.setStyleSheet("font-size: 16px; height: 40px;")
-        move_up_btn.clicked.connect(lambda _, row=row_index: self.move_layer_up(row))
-
-        move_down_btn = QPushButton("Down")
-        move_down_btn.setStyleSheet("font-size: 16px; height: 40px;")
-        move_down_btn.clicked.connect(lambda _, row=row_index: self.move_layer_down(row))
-
-        actions_layout = QVBoxLayout()
-        actions_layout.addWidget(move_up_btn)
-        actions_layout.addWidget(move_down_btn)
-        actions_widget = QWidget()
-        actions_widget.setLayout(actions_layout)
-        self.layers_table.setCellWidget(row_index, 6, actions_widget)
-
-        delete_btn = QPushButton("Delete")
-        delete_btn.setStyleSheet("font-size: 16px; height: 40px;")
-        delete_btn.clicked.connect(lambda _, row=row_index: self.delete_layer(row))
-        self.layers_table.setCellWidget(row_index, 7, delete_btn)
-
-    def update_card_data_from_table(self):
-        for row in range(self.card_data_table.rowCount()):
-            card_data = {}
-            for column in range(self.card_data_table.columnCount()):
-                item = self.card_data_table.item(row, column)
-                if item:
-                    card_data[self.card_data_table.horizontalHeaderItem(column).text()] = item.text()
-            self.card_data[row] = card_data
-        # Update layers_table with the new card_data
-        self.update_layers_table()
+                self.card_data_model.setData(self.card_data_model.index(row, column), file_name)
 
     def toggle_demo_data(self, state):
         if state == Qt.CheckState.Checked:
             self.load_demo_data()
         else:
-            self.card_data = []
-
-    def load_demo_data(self):
-        if not self.demo_data_loaded:
-            try:
-                # Use pandas with explicit encoding and error handling
-                df = pd.read_csv(DEMO_CSV_FILE, encoding='utf-8', on_bad_lines='skip')
-                self.card_data = df.to_dict("records")
-                if not self.card_data:
-                    raise ValueError("No data loaded from CSV file")
-                self.demo_data_loaded = True
-                self.update_card_data_table()
-                print(f"Loaded {len(self.card_data)} cards from demo data")
-            except Exception as e:
-                QMessageBox.warning(self, "Error", f"Failed to load demo data: {str(e)}")
-                self.card_data = []
-                self.demo_data_loaded = False
+            self.card_data = CardDataStore()
+            self.update_card_data_table()
 
     def load_template(self):
         file_name, _ = QFileDialog.getOpenFileName(
@@ -430,6 +465,7 @@ class CardMaker(QMainWindow):
             QMessageBox.warning(None, "Error", "Invalid template format")
             return
 
+        data["layers"] = ordered_layers(data["layers"])  # Listed the way cards draw them
         if not self.template:
             self.template = CardTemplate(data)
         else:
@@ -464,9 +500,7 @@ class CardMaker(QMainWindow):
         if not file_name:
             return
 
-        self.update_card_data_from_table()
-        df = pd.DataFrame(self.card_data)
-        df.to_csv(file_name, index=False)
+        self.write_card_data(file_name)
 
     def save_as_card_data(self):
         file_name, _ = QFileDialog.getSaveFileName(
@@ -475,9 +509,13 @@ class CardMaker(QMainWindow):
         if not file_name:
             return
 
-        self.update_card_data_from_table()
-        df = pd.DataFrame(self.card_data)
-        df.to_csv(file_name, index=False)
+        self.write_card_data(file_name)
+
+    def write_card_data(self, file_name):
+        try:
+            self.card_data.write_csv(file_name)
+        except OSError as e:
+            QMessageBox.warning(self, "Error", f"Failed to save card data: {e}")
 
     def load_card_data(self):
         file_name, _ = QFileDialog.getOpenFileName(
@@ -487,78 +525,19 @@ class CardMaker(QMainWindow):
             return
 
         try:
-            df = pd.read_csv(file_name)
-            self.card_data = df.to_dict("records")
+            self.card_data = CardDataStore.from_csv(file_name)
+            self.current_card_index = 0
             self.update_card_data_table()
             self.update_card_preview()
-        except (FileNotFoundError, pd.errors.ParserError) as e:
+        except (OSError, UnicodeDecodeError, csv.Error) as e:
             QMessageBox.warning(None, "Error", f"Failed to load card data: {e}")
 
-    def update_card_data_table(self):
-        if not self.card_data:
-            return
-
-        self.card_data_table.setRowCount(len(self.card_data))
-        self.card_data_table.setColumnCount(len(self.card_data[0]))
-        self.card_data_table.setHorizontalHeaderLabels(self.card_data[0].keys())
-
-        for i, card in enumerate(self.card_data):
-            for j, (key, value) in enumerate(card.items()):
-                item = QTableWidgetItem(str(value))
-                item.setFlags(Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsUserCheckable | Qt.ItemFlag.ItemIsEditable)
-                self.card_data_table.setItem(i, j, item)
-
-    def update_card_preview(self):
-        if not self.template or not self.card_data:
-            return
-
-        try:
-            card_data = self.card_data[self.current_card_index]
-            # Initialize provided_positions properly
-            provided_positions = {}
-            if hasattr(self.template, 'data_fields'):
-                for field in self.template.data_fields:
-                    provided_positions[field] = (0, 0)
-
-            image = self.render_card(
-                card_data,
-                include_bleed=False,
-                data_field_position=None,
-                font="Default",
-                provided_positions=provided_positions
-            )
-            pixmap = QPixmap.fromImage(image)
-            scaled_pixmap = pixmap.scaled(
-                self.card_preview_label.size(),
-                Qt.AspectRatioMode.KeepAspectRatio,
-                Qt.TransformationMode.SmoothTransformation,
-            )
-            self.card_preview_label.setPixmap(scaled_pixmap)
-
-            # Update card properties label
-            properties_text = "<br>".join(f"<b>{key}:</b> {value}" for key, value in card_data.items())
-            self.card_properties_label.setText(f"<div style='white-space: pre-wrap;'>Properties:<br>{properties_text}</div>")
-
-            # Update layers table with the new card_data
-            self.update_layers_table(card_data)
-
-        except Exception as e:
-            QMessageBox.warning(self, "Error", f"Failed to update card preview: {str(e)}")
-
     def update_preview(self):
         if not self.template or not self.card_data:
             return
 
         card_data = self.card_data[self.current_card_index]
-        provided_positions = {field: (0, 0) for field in self.template.data_fields}  # Initialize provided_positions
-        image = self.render_card(card_data, include_bleed=False, data_field_position=None, font="Default", provided_positions=provided_positions)
-        pixmap = QPixmap.fromImage(image)
-        scaled_pixmap = pixmap.scaled(
-            self.card_preview_label.size(),
-            Qt.AspectRatioMode.KeepAspectRatio,
-            Qt.TransformationMode.SmoothTransformation,
-        )
-        self.card_preview_label.setPixmap(scaled_pixmap)
+        self.request_preview()
 
         # Update card properties label
         properties_text = "<br>".join(f"<b>{key}:</b> {value}" for key, value in card_data.items())
@@ -574,9 +553,25 @@ class CardMaker(QMainWindow):
         if not dir_name:
             return
 
-        for i, card in enumerate(self.card_data):
-            image = self.render_card(card)
-            image.save(f"{dir_name}/card_{i+1}.png")
+        threads = self.export_workers_spin.value()
+        renderer = self._export_renderer()
+        encoding = self.image_encoding()
+        cache = None
+        if self.reuse_renders_check.isChecked():
+            cache = RenderCache(dir_name, renderer.template, encoding=encoding.describe())
+        self._start_export_job(
+            renderjobs.png_export_job(renderer, self.card_data, dir_name, threads, cache, encoding),
+            threads,
+            dir_name,
+        )
+
+    def image_encoding(self):
+        return ImageEncoding(
+            self.image_format_combo.currentText(),
+            self.image_quality_spin.value(),
+            self.image_compression_spin.value(),
+            self.strip_alpha_check.isChecked(),
+        )
 
     def export_pdf(self):
         if not self.card_data:
@@ -588,25 +583,198 @@ class CardMaker(QMainWindow):
         if not file_name:
             return
 
-        writer = QPdfWriter(file_name)
-        page_size = self.get_pdf_page_size()
-        writer.setPageSize(page_size)
+        sheet_options = None
+        if self.impose_pdf_check.isChecked():
+            sheet_options = {
+                "gutter": self.pdf_gutter_spin.value(),
+                "crop_marks": self.crop_marks_check.isChecked(),
+                "back_path": DEMO_CARD_BACK_FILE if self.duplex_backs_check.isChecked() else None,
+            }
+
+        self._start_export_job(
+            renderjobs.pdf_export_job(
+                self._export_renderer(),
+                self.card_data,
+                file_name,
+                self.get_pdf_page_size(),
+                sheet_options,
+                vector=self.vector_pdf_check.isChecked(),
+            ),
+            1,
+            file_name,
+        )
+
+    def _start_export_job(self, job, threads, target):
+        if self._export_job is not None:
+            QMessageBox.warning(self, "Error", "An export is already running")
+            return
+
+        self._export_job = job
+        job.progress.connect(self.show_export_progress)
+        job.failed.connect(lambda message: QMessageBox.warning(self, "Error", f"Export failed: {message}"))
+        job.finished.connect(lambda completed: self._export_finished(completed, target))
+        self.export_pool.setMaxThreadCount(threads)
+        self.cancel_export_btn.setEnabled(True)
+        self.statusBar().showMessage(f"Exporting cards: 0/{job.total}")
+        job.start(self.export_pool)
+
+    def show_export_progress(self, done, total):
+        self.statusBar().showMessage(f"Exporting cards: {done}/{total}")
+
+    def cancel_export(self):
+        if self._export_job is not None:
+            self._export_job.cancel()
+
+    def _export_finished(self, completed, target):
+        job, self._export_job = self._export_job, None
+        self.cancel_export_btn.setEnabled(False)
+        if completed:
+            self.statusBar().showMessage(f"Exported {job.total} cards to {target}")
+        else:
+            self.statusBar().showMessage(f"Export stopped after {job.done} of {job.total} cards")
+        if self.renderer.profiler is not None:
+            self.update_render_stats()
+
+    def _export_renderer(self):
+        """Renderer over a copy of the template, so edits made during a background export cannot race it"""
+        renderer = CardRenderer(CardTemplate(copy.deepcopy(self.template.to_dict())), asset_cache=self.asset_cache)
+        renderer.profiler = self.renderer.profiler
+        return renderer
+
+    def toggle_render_profiling(self, state):
+        # Previews and exports started from now on time their stages
+        self.renderer.profiler = self.profiler if state == Qt.CheckState.Checked.value else None
+
+    def update_render_stats(self):
+        rows = self.profiler.summary()[:RENDER_STATS_ROWS]
+        self.render_stats_table.setRowCount(len(rows))
+        for i, row in enumerate(rows):
+            values = (row["stage"], row["label"], str(row["count"]), f"{row['total_ms']:.1f}", f"{row['mean_ms']:.2f}")
+            for column, value in enumerate(values):
+                self.render_stats_table.setItem(i, column, QTableWidgetItem(value))
+
+    def reset_render_stats(self):
+        self.profiler.clear()
+        self.update_render_stats()
+
+    def save_render_stats(self):
+        file_name, _ = QFileDialog.getSaveFileName(self, "Save Render Stats", "", "JSON files (*.json)")
+        if file_name:
+            try:
+                self.profiler.save_json(file_name)
+            except OSError as e:
+                QMessageBox.warning(self, "Error", f"Failed to save render stats: {str(e)}")
+
+    def save_render_trace(self):
+        file_name, _ = QFileDialog.getSaveFileName(
+            self, "Save Chrome Trace", "", "Trace files (*.json)"
+        )
+        if file_name:
+            try:
+                self.profiler.save_chrome_trace(file_name)
+            except OSError as e:
+                QMessageBox.warning(self, "Error", f"Failed to save render trace: {str(e)}")
+
+    def request_preview(self):
+        """
+        Show the current card from the preview cache, rendering it on the preview
+        pool on a miss, then prefetch the cards around it.
+        """
+        if not self.template or not self.card_data:
+            return
+
+        revision = self._current_template_revision()
+        self._cancel_stale_preview_jobs(revision)
 
-        # Convert template dimensions from units to millimeters if necessary
-        width_mm = self.template.width + 2 * self.template.bleed
-        height_mm = self.template.height + 2 * self.template.bleed
+        key = (self.current_card_index, revision)
+        pixmap = self._preview_cache.get(key)
+        if pixmap is not None:
+            self._preview_cache.move_to_end(key)
+            self.card_preview_label.setPixmap(pixmap)
+        else:
+            self._start_preview_render(key, PREVIEW_PRIORITY)
+
+        for offset in PREVIEW_PREFETCH_OFFSETS:
+            index = self.current_card_index + offset
+            if 0 <= index < len(self.card_data) and (index, revision) not in self._preview_cache:
+                self._start_preview_render((index, revision), PREFETCH_PRIORITY)
+
+    def _current_template_revision(self):
+        """Bump the template revision whenever the template's contents differ from the last preview"""
+        signature = json.dumps(self.template.to_dict(), sort_keys=True, default=str)
+        if signature != self._template_signature:
+            self._template_signature = signature
+            self._template_revision += 1
+            self.template.invalidate_render_plan()  # The editor changes the template in place
+            self._preview_cache.clear()
+        return self._template_revision
+
+    def _start_preview_render(self, key, priority):
+        job = self._preview_jobs.get(key)
+        if job is not None and not job.is_cancelled() and not job.is_finished():
+            return  # Already on its way
+
+        index = key[0]
+        provided_positions = {field: (0, 0) for field in self.template.data_fields}
+        renderer = self._template_renderer()
+        if priority == PREVIEW_PRIORITY:
+            # The card on screen is the one being edited, prefetches render from scratch
+            renderer = self.live_renderer
+        job = renderjobs.preview_job(
+            renderer,
+            self.card_data[index],
+            index,
+            target_size=self.card_preview_label.size(),
+            include_bleed=False,
+            data_field_position=None,
+            font="Default",
+            provided_positions=provided_positions,
+        )
+        job.card_rendered.connect(lambda _, image, key=key, job=job: self._preview_ready(key, job, image))
+        job.failed.connect(lambda message: QMessageBox.warning(self, "Error", f"Failed to update card preview: {message}"))
+        self._preview_jobs[key] = job
+        job.start(self.preview_pool, priority)
+
+    def _cancel_stale_preview_jobs(self, revision):
+        """Drop finished jobs and cancel renders for an old template or cards out of prefetch range"""
+        window = range(
+            self.current_card_index + min(PREVIEW_PREFETCH_OFFSETS),
+            self.current_card_index + max(PREVIEW_PREFETCH_OFFSETS) + 1,
+        )
+        for key, job in list(self._preview_jobs.items()):
+            if job.is_finished():
+                del self._preview_jobs[key]
+            elif key[1] != revision or key[0] not in window:
+                job.cancel()
+
+    def _preview_ready(self, key, job, image):
+        if key[1] != self._template_revision:
+            return  # Rendered from a template that has changed since
+        if job.is_cancelled() or self._preview_jobs.get(key) is not job:
+            return  # Rendered from card data that has changed since
 
-        # Set page margins to zero
-        margins = QMarginsF(0, 0, 0, 0)
-        writer.setPageMargins(margins)
+        pixmap = QPixmap.fromImage(image)
+        self._preview_cache[key] = pixmap
+        while len(self._preview_cache) > PREVIEW_CACHE_SIZE:
+            self._preview_cache.popitem(last=False)
+        if key[0] == self.current_card_index:
+            self.card_preview_label.setPixmap(pixmap)
+            if self.renderer.profiler is not None:
+                self.update_render_stats()
+
+    def invalidate_previews(self, first_row=None, last_row=None):
+        """
+        Forget cached previews of the given card rows, or of every card, and
+        cancel their renders still running from the old data, so the next
+        request renders them again.
+        """
+        def invalidated(key):
+            return first_row is None or first_row <= key[0] <= last_row
 
-        painter = QPainter(writer)
-        for card in self.card_data:
-            image = self.render_card(card, include_bleed=True)
-            painter.drawImage(QPointF(0, 0), image)
-            if card != self.card_data[-1]:  # Don't add a new page after the last card
-                writer.newPage()
-        painter.end()
+        for key in [key for key in self._preview_cache if invalidated(key)]:
+            del self._preview_cache[key]
+        for key in [key for key in self._preview_jobs if invalidated(key)]:
+            self._preview_jobs.pop(key).cancel()
 
     def move_layer_up(self, row):
         if row > 0:
@@ -614,6 +782,7 @@ class CardMaker(QMainWindow):
                 self.template.layers[row],
                 self.template.layers[row - 1],
             )
+            self._renumber_layers()
             self.update_layers_table()
             self.update_preview()
 
@@ -623,9 +792,15 @@ class CardMaker(QMainWindow):
                 self.template.layers[row],
                 self.template.layers[row + 1],
             )
+            self._renumber_layers()
             self.update_layers_table()
             self.update_preview()
 
+    def _renumber_layers(self):
+        # Cards draw layers by their order, the table lists them in that order
+        for index, layer in enumerate(self.template.layers):
+            layer["order"] = index
+
     def add_data_field(self):
         field_name, ok = QInputDialog.getText(
             self, "Add Data Field", "Enter the new data field name:"
@@ -679,24 +854,20 @@ class CardMaker(QMainWindow):
             return
 
         self.template.set_card_image_path(file_name)
-        pixmap = QPixmap(file_name)
-        scaled_pixmap = pixmap.scaled(
-            self.card_image_label.size(),
-            Qt.AspectRatioMode.KeepAspectRatio,
-            Qt.TransformationMode.SmoothTransformation,
-        )
-        self.card_image_label.setPixmap(scaled_pixmap)
+        # Decoded straight to the label size, source art is often much larger
+        size = self.card_image_label.size()
+        image = self.asset_cache.fitted_image(file_name, size.width(), size.height())
+        self.card_image_label.setPixmap(QPixmap.fromImage(image))
+        self.request_preview()  # Cards without an Illustration of their own show it
 
     def show_previous_card(self):
         if self.current_card_index > 0:
             self.current_card_index -= 1
-            self.update_preview()
             self.update_card_preview()
 
     def show_next_card(self):
         if self.current_card_index < len(self.card_data) - 1:
             self.current_card_index += 1
-            self.update_preview()
             self.update_card_preview()
 
     def get_pdf_page_size(self):
@@ -709,6 +880,11 @@ class CardMaker(QMainWindow):
         else:
             return QPageSize(PDF_PAGE_SIZES[page_size])
 
+    def _template_renderer(self):
+        """Return the shared renderer pointed at the current template"""
+        self.renderer.template = self.template
+        return self.renderer
+
     def render_card(
         self,
         card_data=None,
@@ -717,73 +893,19 @@ class CardMaker(QMainWindow):
         font="Default",
         use_provided_positions=False,
         provided_positions=None,
+        scale=None,
+        target_size=None,
     ):
-        width = self.template.width
-        height = self.template.height
-
-        if include_bleed:
-            width += 2 * self.template.bleed
-            height += 2 * self.template.bleed
-
-        # Initialize provided_positions if None
-        if provided_positions is None:
-            provided_positions = {}
-            if hasattr(self.template, 'data_fields'):
-                for field in self.template.data_fields:
-                    provided_positions[field] = (0, 0)
-
-        image = QImage(width, height, QImage.Format.Format_ARGB32)
-        image.fill(Qt.GlobalColor.transparent)
-
-        painter = QPainter(image)
-        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
-
-        # Draw layers
-        if hasattr(self.template, 'layers'):
-            for layer in self.template.layers:
-                if layer.get("visible", True):
-                    if layer["type"] == "svg":
-                        renderer = QSvgRenderer(layer["path"])
-                        renderer.render(painter)
-                    elif layer["type"] == "png":
-                        pixmap = QPixmap(layer["path"])
-                        pos_x = layer["position"][0] if not use_provided_positions else provided_positions.get(layer["id"], (0, 0))[0]
-                        pos_y = layer["position"][1] if not use_provided_positions else provided_positions.get(layer["id"], (0, 0))[1]
-                        painter.drawPixmap(QPointF(pos_x, pos_y), pixmap)
-
-        # Draw card data if provided
-        if card_data and hasattr(self.template, 'data_fields'):
-            font_id = self.template.fonts.get(font, QFont("Default"))
-            painter_font = QFont(font_id)
-            painter_font.setPointSize(24)
-            painter.setFont(painter_font)
-            painter.setPen(QColor("black"))
-
-            for field in self.template.data_fields:
-                if field in card_data:
-                    # Get position from template or provided positions
-                    pos_x, pos_y = (0, 0)  # Default position
-                    if hasattr(self.template, 'data_field_positions') and field in self.template.data_field_positions:
-                        pos_x = self.template.data_field_positions[field][0]
-                        pos_y = self.template.data_field_positions[field][1]
-                    elif field in provided_positions:
-                        pos_x = provided_positions[field][0]
-                        pos_y = provided_positions[field][1]
-
-                    text_rect = QRectF(
-                        pos_x,
-                        pos_y,
-                        width - 2 * self.template.bleed if include_bleed else width,
-                        height - 2 * self.template.bleed if include_bleed else height
-                    )
-                    painter.drawText(
-                        text_rect,
-                        Qt.AlignmentFlag.AlignCenter,
-                        str(card_data.get(field, ""))
-                    )
-
-        painter.end()
-        return image
+        return self._template_renderer().render_card(
+            card_data,
+            include_bleed=include_bleed,
+            data_field_position=data_field_position,
+            font=font,
+            use_provided_positions=use_provided_positions,
+            provided_positions=provided_positions,
+            scale=scale,
+            target_size=target_size,
+        )
 
     def eventFilter(self, source, event):
         if event.type() == QEvent.Type.Drop and source is self.layers_table.viewport():
@@ -798,6 +920,7 @@ class CardMaker(QMainWindow):
                             self.template.layers[drop_row],
                             self.template.layers[selected_row],
                         )
+                        self._renumber_layers()
                         self.update_layers_table()
                         self.update_preview()
                         return True
@@ -818,20 +941,26 @@ class CardMaker(QMainWindow):
         preview_layout.addWidget(preview_label)
 
         card_data = self.card_data[self.current_card_index]
-        image = self.render_card(card_data, include_bleed=False, data_field_position=None, font="Default")
-        pixmap = QPixmap.fromImage(image)
-        scaled_pixmap = pixmap.scaled(
-            preview_label.size(),
-            Qt.AspectRatioMode.KeepAspectRatio,
-            Qt.TransformationMode.SmoothTransformation,
+        image = self.render_card(
+            card_data, include_bleed=False, data_field_position=None, font="Default", target_size=preview_label.size()
         )
-        preview_label.setPixmap(scaled_pixmap)
+        preview_label.setPixmap(QPixmap.fromImage(image))
 
         preview_window.show()
 
+    def closeEvent(self, event):
+        # Stop background renders before the window and its renderer go away
+        self.cancel_export()
+        for job in self._preview_jobs.values():
+            job.cancel()
+        self.export_pool.waitForDone()
+        self.preview_pool.waitForDone()
+        super().closeEvent(event)
+
     def cleanup(self):
         """Proper cleanup of resources"""
-        self._image_cache.clear()
+        self.renderer.clear_caches()
+        self.live_renderer.clear()
         # Clean up any other resources...
 
     def __del__(self):
@@ -840,9 +969,7 @@ class CardMaker(QMainWindow):
     def load_demo_data(self):
         if not self.demo_data_loaded:
             try:
-                # Read CSV with proper encoding
-                df = pd.read_csv(DEMO_CSV_FILE, encoding='utf-8')
-                self.card_data = df.to_dict("records")
+                self.card_data = CardDataStore.from_csv(DEMO_CSV_FILE)
                 if not self.card_data:
                     raise ValueError("No data loaded from CSV file")
                 self.demo_data_loaded = True
@@ -851,49 +978,50 @@ class CardMaker(QMainWindow):
                 self.update_card_preview()
             except Exception as e:
                 QMessageBox.warning(self, "Error", f"Failed to load demo data: {str(e)}")
-                self.card_data = []
+                self.card_data = CardDataStore()
                 self.demo_data_loaded = False
 
     def update_card_data_table(self):
-        if not self.card_data:
-            return
-
-        # Block signals during update
-        self.card_data_table.blockSignals(True)
-        try:
-            # Clear existing data
-            self.card_data_table.setRowCount(0)
-            self.card_data_table.setColumnCount(0)
-
-            # Set up table structure
-            columns = list(self.card_data[0].keys())
-            self.card_data_table.setColumnCount(len(columns))
-            self.card_data_table.setHorizontalHeaderLabels(columns)
-            self.card_data_table.setRowCount(len(self.card_data))
-
-            # Fill data
-            for i, card in enumerate(self.card_data):
-                for j, (key, value) in enumerate(card.items()):
-                    item = QTableWidgetItem(str(value))
-                    self.card_data_table.setItem(i, j, item)
-
-            # Adjust column widths
-            self.card_data_table.resizeColumnsToContents()
-        finally:
-            self.card_data_table.blockSignals(False)
+        # The view pulls cells from the model on demand, only the store needs swapping
+        self.card_data_model.set_store(self.card_data)
+        self.invalidate_previews()
+        self.card_data_table.resizeColumnsToContents()
 
     def update_layers_table(self, card_data=None):  # Make card_data optional
-        if not self.template or not self.template.layers:
+        """
+        Bring the layers table in line with template.layers, touching only rows whose
+        values changed. Rows and their buttons are reused, and nothing is done when
+        the layers are unchanged since the last update.
+        """
+        if not self.template:
+            return
+
+        rows = [self._layer_row_values(i, layer) for i, layer in enumerate(self.template.layers)]
+        if rows == self._layers_table_rows:
             return
 
         self.layers_table.blockSignals(True)
+        self.layers_table.setUpdatesEnabled(False)
         try:
-            self.layers_table.setRowCount(0)
-            for i, layer in enumerate(self.template.layers):
-                self._add_layer_row(i, layer)
+            while self.layers_table.rowCount() > len(rows):
+                self.layers_table.removeRow(self.layers_table.rowCount() - 1)
+            while self.layers_table.rowCount() < len(rows):
+                self._add_layer_row(self.layers_table.rowCount())
+
+            for row_index, values in enumerate(rows):
+                if row_index < len(self._layers_table_rows) and self._layers_table_rows[row_index] == values:
+                    continue
+                for col, value in enumerate(values):
+                    item = self.layers_table.item(row_index, col)
+                    if item is None:
+                        self.layers_table.setItem(row_index, col, QTableWidgetItem(value))
+                    elif item.text() != value:
+                        item.setText(value)
             self.layers_table.resizeColumnsToContents()
         finally:
+            self.layers_table.setUpdatesEnabled(True)
             self.layers_table.blockSignals(False)
+        self._layers_table_rows = rows
 
     def update_card_preview(self):
         if not self.template or not self.card_data:
@@ -901,23 +1029,7 @@ class CardMaker(QMainWindow):
 
         try:
             card_data = self.card_data[self.current_card_index]
-            provided_positions = {field: (0, 0) for field in self.template.data_fields}
-            
-            image = self.render_card(
-                card_data,
-                include_bleed=False,
-                data_field_position=None,
-                font="Default",
-                provided_positions=provided_positions
-            )
-            
-            pixmap = QPixmap.fromImage(image)
-            scaled_pixmap = pixmap.scaled(
-                self.card_preview_label.size(),
-                Qt.AspectRatioMode.KeepAspectRatio,
-                Qt.TransformationMode.SmoothTransformation,
-            )
-            self.card_preview_label.setPixmap(scaled_pixmap)
+            self.request_preview()
 
             # Update properties label
             properties_text = "<br>".join(f"<b>{key}:</b> {value}" for key, value in card_data.items())
@@ -929,27 +1041,21 @@ class CardMaker(QMainWindow):
             QMessageBox.warning(self, "Error", f"Failed to update card preview: {str(e)}")
 
 
-    def _add_layer_row(self, row_index, layer):
-        self.layers_table.insertRow(row_index)
-        
-        # Create items with proper data
-        items = [
-            QTableWidgetItem(layer.get("path", "")),
-            QTableWidgetItem(layer.get("type", "")),
-            QTableWidgetItem(str(layer.get("position", (0, 0))[0])),
-            QTableWidgetItem(str(layer.get("position", (0, 0))[1])),
-            QTableWidgetItem(str(layer.get("order", row_index))),
-            QTableWidgetItem(str(layer.get("visible", True)))
-        ]
-        
-        for col, item in enumerate(items):
-            self.layers_table.setItem(row_index, col, item)
+    def _layer_row_values(self, row_index, layer):
+        return (
+            layer.get("path", ""),
+            layer.get("type", ""),
+            str(layer.get("position", (0, 0))[0]),
+            str(layer.get("position", (0, 0))[1]),
+            str(layer.get("order", row_index)),
+            str(layer.get("visible", True)),
+        )
 
-        # Add action buttons
+    def _add_layer_row(self, row_index):
+        # Items are filled in by update_layers_table, the buttons act on whatever layer sits at row_index
+        self.layers_table.insertRow(row_index)
         self._add_layer_action_buttons(row_index)
 
-
-
     def _add_layer_action_buttons(self, row_index):
         # Create action buttons widget
         actions_widget = QWidget()
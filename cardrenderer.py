@@ -0,0 +1,488 @@
+# cardrenderer.py
+import os
+import threading
+from collections import OrderedDict
+from contextlib import nullcontext
+
+from PyQt6.QtCore import Qt, QPointF, QRectF
+from PyQt6.QtGui import QImage, QPainter, QRegion
+
+from assetcache import AssetCache, file_key
+from imagepool import CANVAS_FORMAT, ImagePool
+from imposition import scaled_size
+from renderplan import ILLUSTRATION_LAYER, SVG_LAYER
+from textlayout import TextLayoutCache
+import renderprofiler
+
+STATIC_LAYER_CACHE_SIZE = 8  # Template backgrounds kept per size/bleed combination
+ILLUSTRATION_FIELD = "Illustration"  # Card column with the image file of the card's illustration
+
+
+class CardRenderer:
+    """
+    Renders cards of a CardTemplate into QImages.
+
+    Needs a QGuiApplication for fonts, but no window, so the same renderer
+    backs the CardMaker previews, its exports and headless batch runs. Only
+    QImage, QPainter and QSvgRenderer are used, so render_card may be called
+    from worker threads.
+    """
+
+    def __init__(self, template=None, asset_cache=None):
+        self.template = template
+        self.asset_cache = asset_cache if asset_cache is not None else AssetCache()
+        self._static_layer_cache = OrderedDict()  # Pre-composited template backgrounds
+        self._static_layer_lock = threading.Lock()
+        self.text_layouts = TextLayoutCache()
+        self.profiler = None  # RenderProfiler timing each render stage, when profiling
+        self.svg_rasters = None  # svgraster.SvgRasterCache reused by raster renders, when enabled
+        self.image_pool = ImagePool()  # Canvases of rendered cards that exports are done with
+
+    def clear_caches(self):
+        self.asset_cache.clear()
+        self.text_layouts.clear()
+        self.image_pool.clear()
+        with self._static_layer_lock:
+            self._static_layer_cache.clear()
+
+    def render_card(
+        self,
+        card_data=None,
+        include_bleed=False,
+        data_field_position=None,
+        font="Default",
+        use_provided_positions=False,
+        provided_positions=None,
+        scale=None,
+        target_size=None,
+    ):
+        """
+        Render a card into a Format_ARGB32_Premultiplied QImage from image_pool.
+
+        scale, or a target_size QSize the card is fitted into keeping its aspect
+        ratio, renders straight at that resolution through a scaled painter, so
+        previews of large print templates never paint full-size pixels. Hand
+        the image to image_pool.release once done with it to have the next
+        card painted into it instead of a new allocation.
+        """
+        plan = self.template.render_plan()
+        width, height, scale = self.card_geometry(include_bleed, scale, target_size, plan)
+
+        with self.stage(renderprofiler.CARD):
+            image = self.render_background(
+                width, height, scale, use_provided_positions, provided_positions, card_data, plan
+            )
+            painter = QPainter(image)
+            self._prepare_painter(painter, scale)
+            self._draw_fields(painter, card_data, font, provided_positions, plan)
+            painter.end()
+        return image
+
+    def stage(self, stage, label=""):
+        """Context timing a render stage when a profiler is set, a no-op otherwise"""
+        if self.profiler is None:
+            return nullcontext()
+        return self.profiler.stage(stage, label)
+
+    def card_geometry(self, include_bleed=False, scale=None, target_size=None, plan=None):
+        """Card width and height in template pixels and the scale it is rendered at"""
+        plan = plan or self.template.render_plan()
+        width, height = plan.card_size(include_bleed)
+
+        if target_size is not None:
+            scale = min(target_size.width() / width, target_size.height() / height)
+        if scale is None or scale <= 0:
+            scale = 1.0
+        return width, height, scale
+
+    def render_background(
+        self,
+        width,
+        height,
+        scale=1.0,
+        use_provided_positions=False,
+        provided_positions=None,
+        card_data=None,
+        plan=None,
+    ):
+        """Render every layer of a card, but none of its data fields, into a canvas from image_pool"""
+        plan = plan or self.template.render_plan()
+        if use_provided_positions:
+            static_layers, dynamic_layers = (), plan.layers
+        else:
+            static_layers, dynamic_layers = plan.static_layers, plan.dynamic_layers
+
+        image = self.image_pool.acquire(*scaled_size(width, height, scale))
+        if not static_layers:
+            image.fill(Qt.GlobalColor.transparent)
+        painter = QPainter(image)
+        if static_layers:
+            # Start from the pre-composited template background, a plain copy of its pixels
+            painter.setCompositionMode(QPainter.CompositionMode.CompositionMode_Source)
+            painter.drawImage(0, 0, self._static_layers_image(plan, width, height, scale))
+            painter.setCompositionMode(QPainter.CompositionMode.CompositionMode_SourceOver)
+
+        self._prepare_painter(painter, scale)
+        # Draw the layers that may change from card to card
+        for op in dynamic_layers:
+            self._draw_layer(painter, op, width, height, use_provided_positions, provided_positions, card_data)
+        painter.end()
+        return image
+
+    def paint_card(
+        self,
+        painter,
+        card_data=None,
+        include_bleed=False,
+        font="Default",
+        use_provided_positions=False,
+        provided_positions=None,
+    ):
+        """
+        Paint a card straight onto painter with its top left corner at the origin.
+
+        Nothing is rasterized: SVG layers and data fields stay vectors and image
+        layers are drawn from the asset cache, so a PDF painter embeds each image
+        once however many cards use it. One card pixel is one device unit.
+        """
+        plan = self.template.render_plan()
+        width, height = plan.card_size(include_bleed)
+
+        painter.save()
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.setClipRect(QRectF(0, 0, width, height))
+        for op in plan.layers:
+            self._draw_layer(painter, op, width, height, use_provided_positions, provided_positions, card_data)
+        self._draw_fields(painter, card_data, font, provided_positions, plan)
+        painter.restore()
+
+    def _draw_fields(self, painter, card_data, font, provided_positions, plan):
+        if not card_data:
+            return
+
+        self._prepare_field_font(painter, font, plan)
+        for field, text_rect, text in self.field_texts(card_data, provided_positions, plan):
+            with self.stage(renderprofiler.TEXT_DRAW, field):
+                self.text_layouts.block(painter, text_rect, text).draw(painter, text_rect)
+
+    @staticmethod
+    def _prepare_field_font(painter, font, plan):
+        painter.setFont(plan.field_font(font))
+        painter.setPen(plan.text_color)
+
+    def field_texts(self, card_data, provided_positions=None, plan=None):
+        """
+        (field, text rect, text) of every data field the card has a value for. A
+        field is placed at its template position, else at its provided position.
+        """
+        texts = []
+        if not card_data:
+            return texts
+
+        plan = plan or self.template.render_plan()
+        provided_positions = provided_positions or {}
+        for op in plan.fields:
+            if op.name in card_data:
+                text_rect = op.text_rect(plan.text_size, provided_positions)
+                texts.append((op.name, text_rect, str(card_data.get(op.name, ""))))
+        return texts
+
+    def render_back(self, path, include_bleed=True):
+        """Render a card back (SVG or image) stretched over the whole card"""
+        width, height = self.template.render_plan().card_size(include_bleed)
+
+        image = QImage(width, height, CANVAS_FORMAT)
+        image.fill(Qt.GlobalColor.transparent)
+        painter = QPainter(image)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        if path.lower().endswith(".svg"):
+            renderer = self.asset_cache.svg(path)
+            with self.asset_cache.svg_lock:
+                renderer.render(painter, QRectF(0, 0, width, height))
+        else:
+            painter.drawImage(QRectF(0, 0, width, height), self.asset_cache.image(path))
+        painter.end()
+        return image
+
+    @staticmethod
+    def _prepare_painter(painter, scale):
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        if scale != 1.0:
+            # Card coordinates stay in template pixels, the transform maps them to the output size
+            painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform)
+            painter.scale(scale, scale)
+
+    def illustration_path(self, card_data=None):
+        """
+        Image file of card_illustration layers: the card's Illustration column,
+        else (also when that file does not exist) the template's card_image_path.
+        """
+        path = card_data.get(ILLUSTRATION_FIELD) if card_data else None
+        if isinstance(path, str) and path.strip() and os.path.isfile(path.strip()):
+            return path.strip()
+        return getattr(self.template, "card_image_path", "") or ""
+
+    def illustration_requests(self, card_data=None, include_bleed=False, scale=None, target_size=None):
+        """(path, width, height) of every illustration decode render_card does for card_data"""
+        path = self.illustration_path(card_data)
+        if not os.path.isfile(path):
+            return []
+        width, height, scale = self.card_geometry(include_bleed, scale, target_size)
+        return [
+            (path,) + self._illustration_pixels(self._illustration_box(op, op.x, op.y, width, height), scale)
+            for op in self.template.render_plan().illustrations
+        ]
+
+    def load_illustrations(self, card_data=None, include_bleed=False, scale=None, target_size=None):
+        """Decode the illustrations of a card into the asset cache ahead of rendering it, from any thread"""
+        for path, width, height in self.illustration_requests(card_data, include_bleed, scale, target_size):
+            with self.stage(renderprofiler.ASSET_LOAD, path):
+                self.asset_cache.fitted_image(path, width, height)
+
+    @staticmethod
+    def _illustration_box(op, pos_x, pos_y, width, height):
+        # An optional layer size, else the rest of the card from the layer position
+        box_width, box_height = op.size or (width - pos_x, height - pos_y)
+        return QRectF(pos_x, pos_y, box_width, box_height)
+
+    @staticmethod
+    def _illustration_pixels(box, scale):
+        return max(1, round(box.width() * scale)), max(1, round(box.height() * scale))
+
+    def _draw_illustration(self, painter, op, pos_x, pos_y, width, height, card_data):
+        """
+        Draw the card's illustration fitted and centred in the layer box. It is
+        decoded at the size it covers on the output device, not at its source size.
+        """
+        path = self.illustration_path(card_data)
+        if not os.path.isfile(path):
+            return  # Nothing to draw, and nothing worth asking every image plugin about
+        box = self._illustration_box(op, pos_x, pos_y, width, height)
+        scale = painter.transform().m11()
+        with self.stage(renderprofiler.ASSET_LOAD, path):
+            image = self.asset_cache.fitted_image(path, *self._illustration_pixels(box, scale))
+        if image.isNull():
+            return
+        image_width = image.width() / scale
+        image_height = image.height() / scale
+        target = QRectF(
+            box.x() + (box.width() - image_width) / 2,
+            box.y() + (box.height() - image_height) / 2,
+            image_width,
+            image_height,
+        )
+        with self.stage(renderprofiler.PIXMAP_DRAW, path):
+            painter.drawImage(target, image)
+
+    def _draw_layer(
+        self, painter, op, width, height, use_provided_positions=False, provided_positions=None, card_data=None
+    ):
+        path = op.path
+        if op.kind == ILLUSTRATION_LAYER:
+            pos_x, pos_y = op.position(use_provided_positions, provided_positions)
+            self._draw_illustration(painter, op, pos_x, pos_y, width, height, card_data)
+        elif op.kind == SVG_LAYER:
+            raster = self._svg_raster(painter, path, width, height)
+            if raster is not None:
+                with self.stage(renderprofiler.PIXMAP_DRAW, path):
+                    painter.drawImage(QRectF(0, 0, width, height), raster)
+                return
+            with self.stage(renderprofiler.ASSET_LOAD, path):
+                renderer = self.asset_cache.svg(path)
+            with self.asset_cache.svg_lock, self.stage(renderprofiler.SVG_RASTERIZE, path):
+                renderer.render(painter, QRectF(0, 0, width, height))
+        else:
+            with self.stage(renderprofiler.ASSET_LOAD, path):
+                layer_image = self.asset_cache.image(path)
+            pos_x, pos_y = op.position(use_provided_positions, provided_positions)
+            with self.stage(renderprofiler.PIXMAP_DRAW, path):
+                painter.drawImage(QPointF(pos_x, pos_y), layer_image)
+
+    def _svg_raster(self, painter, path, width, height):
+        """The SVG layer at path from the raster cache, None to render it as vectors"""
+        if self.svg_rasters is None or not path or not isinstance(painter.device(), QImage):
+            return None
+        pixel_width, pixel_height = scaled_size(width, height, painter.transform().m11())
+
+        def rasterize():
+            image = QImage(pixel_width, pixel_height, CANVAS_FORMAT)
+            image.fill(Qt.GlobalColor.transparent)
+            raster_painter = QPainter(image)
+            raster_painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+            renderer = self.asset_cache.svg(path)
+            with self.asset_cache.svg_lock, self.stage(renderprofiler.SVG_RASTERIZE, path):
+                renderer.render(raster_painter, QRectF(0, 0, pixel_width, pixel_height))
+            raster_painter.end()
+            return image
+
+        with self.stage(renderprofiler.ASSET_LOAD, path):
+            return self.svg_rasters.image(path, pixel_width, pixel_height, rasterize)
+
+    def _static_layers_image(self, plan, width, height, scale=1.0):
+        """Rasterize the static layer prefix once per template, card size, scale and asset version"""
+        key = (width, height, scale, plan.static_key) + tuple(
+            self.asset_cache.asset_key(op.path) for op in plan.static_layers
+        )
+        # Held while rasterizing so concurrent renders wait for one background instead of each building it
+        with self._static_layer_lock:
+            image = self._static_layer_cache.get(key)
+            if image is not None:
+                self._static_layer_cache.move_to_end(key)
+                return image
+
+            image = QImage(*scaled_size(width, height, scale), CANVAS_FORMAT)
+            image.fill(Qt.GlobalColor.transparent)
+            painter = QPainter(image)
+            self._prepare_painter(painter, scale)
+            for op in plan.static_layers:
+                self._draw_layer(painter, op, width, height)
+            painter.end()
+
+            self._static_layer_cache[key] = image
+            while len(self._static_layer_cache) > STATIC_LAYER_CACHE_SIZE:
+                self._static_layer_cache.popitem(last=False)
+            return image
+
+
+class _ComposedCard:
+    """Last card composed by a LiveCardRenderer"""
+
+    def __init__(self, key, background, image, texts, boxes):
+        self.key = key
+        self.background = background  # Layers only, restored under edited text
+        self.image = image
+        self.texts = texts  # field -> drawn text
+        self.boxes = boxes  # field -> QRect the text covers in image pixels
+
+
+class LiveCardRenderer:
+    """
+    Renders the card being edited, repainting only the text that changed.
+
+    The last composed card is kept together with the background under its data
+    fields. When the next render differs from it only in field values, the
+    pixels under the old and new text of the edited fields are restored from
+    that background and just the text crossing them is drawn again, instead of
+    compositing every layer. Has the render_card signature of CardRenderer.
+    """
+
+    def __init__(self, renderer):
+        self.renderer = renderer
+        self.full_renders = 0
+        self.partial_renders = 0
+        self._last = None
+        self._lock = threading.Lock()
+
+    def clear(self):
+        with self._lock:
+            self._last = None
+
+    def render_card(
+        self,
+        card_data=None,
+        include_bleed=False,
+        data_field_position=None,
+        font="Default",
+        use_provided_positions=False,
+        provided_positions=None,
+        scale=None,
+        target_size=None,
+    ):
+        renderer = self.renderer
+        plan = renderer.template.render_plan()
+        width, height, scale = renderer.card_geometry(include_bleed, scale, target_size, plan)
+        provided_positions = provided_positions or {}
+        texts = renderer.field_texts(card_data, provided_positions, plan)
+
+        # Everything but the field values, a change to any of it needs a full render
+        fields = {op.name for op in plan.fields}
+        key = (
+            plan,  # A new plan is compiled whenever the template changes
+            include_bleed,
+            font,
+            use_provided_positions,
+            repr(sorted(provided_positions.items())),
+            width,
+            height,
+            scale,
+            tuple((name, value) for name, value in (card_data or {}).items() if name not in fields),
+            file_key(renderer.illustration_path(card_data)),  # An illustration edited on disk
+        )
+
+        with self._lock:
+            if self._last is None or self._last.key != key:
+                self._render_full(
+                    key, plan, card_data, texts, width, height, scale, font, use_provided_positions, provided_positions
+                )
+            else:
+                self._render_fields(plan, texts, scale, font)
+            # Shallow copy, the next partial render detaches the kept image
+            return QImage(self._last.image)
+
+    def _render_full(
+        self, key, plan, card_data, texts, width, height, scale, font, use_provided_positions, provided_positions
+    ):
+        renderer = self.renderer
+        background = renderer.render_background(
+            width, height, scale, use_provided_positions, provided_positions, card_data, plan
+        )
+        image = QImage(background)
+        painter = QPainter(image)
+        renderer._prepare_painter(painter, scale)
+        renderer._prepare_field_font(painter, font, plan)
+        boxes = {}
+        for field, text_rect, text in texts:
+            with renderer.stage(renderprofiler.TEXT_DRAW, field):
+                block = renderer.text_layouts.block(painter, text_rect, text)
+                boxes[field] = self._text_box(painter, block.bounding_rect(text_rect))
+                block.draw(painter, text_rect)
+        painter.end()
+
+        self._last = _ComposedCard(key, background, image, {field: text for field, _, text in texts}, boxes)
+        self.full_renders += 1
+
+    def _render_fields(self, plan, texts, scale, font):
+        last = self._last
+        new_texts = {field: text for field, _, text in texts}
+        changed = {field for field in set(last.texts) | set(new_texts) if last.texts.get(field) != new_texts.get(field)}
+        if not changed:
+            return
+
+        painter = QPainter(last.image)
+        self.renderer._prepare_painter(painter, scale)
+        self.renderer._prepare_field_font(painter, font, plan)
+        boxes = dict(last.boxes)
+        dirty = QRegion()
+        for field in changed:
+            if field in boxes:
+                dirty += boxes.pop(field)
+        for field, text_rect, text in texts:
+            if field in changed:
+                block = self.renderer.text_layouts.block(painter, text_rect, text)
+                boxes[field] = self._text_box(painter, block.bounding_rect(text_rect))
+                dirty += boxes[field]
+
+        # Put the layers back under the old and the new text, then redraw every
+        # text crossing the restored pixels, all clipped to them
+        transform = painter.transform()
+        painter.resetTransform()
+        painter.setClipRegion(dirty)
+        painter.setCompositionMode(QPainter.CompositionMode.CompositionMode_Source)
+        painter.drawImage(0, 0, last.background)
+        painter.setCompositionMode(QPainter.CompositionMode.CompositionMode_SourceOver)
+        painter.setTransform(transform)
+        for field, text_rect, text in texts:
+            if dirty.intersects(boxes[field]):
+                with self.renderer.stage(renderprofiler.TEXT_DRAW, field):
+                    self.renderer.text_layouts.block(painter, text_rect, text).draw(painter, text_rect)
+        painter.end()
+
+        last.texts = new_texts
+        last.boxes = boxes
+        self.partial_renders += 1
+
+    @staticmethod
+    def _text_box(painter, bounds):
+        """Image pixels covered by text with the given bounds, padded for antialiasing"""
+        box = painter.transform().mapRect(bounds).toAlignedRect().adjusted(-2, -2, 2, 2)
+        return box.intersected(painter.device().rect())
@@ -11,9 +11,28 @@ class CardTemplate:
         self.fonts = data.get("fonts", {})  # Default empty dictionary if not provided
         self.data_field_positions = data.get("data_field_positions", {})  # Default empty dictionary if not provided
         self.card_image_path = data.get("card_image_path", "")  # Default empty string if not provided
+        self._render_plan = None  # Compiled on first render, see render_plan
 
     def set_card_image_path(self, path):
         self.card_image_path = path
+        self.invalidate_render_plan()
+
+    def render_plan(self):
+        """
+        The template compiled for rendering, built once and reused for every
+        card until invalidate_render_plan is called.
+        """
+        plan = self._render_plan
+        if plan is None:
+            # Imported here, the template itself stays free of Qt
+            from renderplan import RenderPlan
+
+            plan = self._render_plan = RenderPlan(self)
+        return plan
+
+    def invalidate_render_plan(self):
+        """Call after changing the template in place, e.g. its layers or data fields"""
+        self._render_plan = None
 
     @classmethod
     def load_from_json(cls, file_path):
@@ -34,9 +53,10 @@ class CardTemplate:
         self.fonts = data.get("fonts", self.fonts)
         self.data_field_positions = data.get("data_field_positions", self.data_field_positions)
         self.card_image_path = data.get("card_image_path", self.card_image_path)
+        self.invalidate_render_plan()
 
-    def save_to_json(self, file_path):
-        data = {
+    def to_dict(self):
+        return {
             "width": self.width,
             "height": self.height,
             "bleed": self.bleed,
@@ -46,6 +66,9 @@ class CardTemplate:
             "data_field_positions": self.data_field_positions,
             "card_image_path": self.card_image_path,
         }
+
+    def save_to_json(self, file_path):
+        data = self.to_dict()
         try:
             with open(file_path, "w") as f:
                 json.dump(data, f)
@@ -0,0 +1,46 @@
+# decodepool.py
+import os
+from collections import deque
+
+DECODE_AHEAD = 8  # Cards whose illustrations are decoded ahead of the one being rendered
+MAX_DECODE_THREADS = 4
+
+
+def default_decode_threads():
+    return min(MAX_DECODE_THREADS, os.cpu_count() or 1)
+
+
+def prefetch_illustrations(renderer, items, card_of=None, ahead=DECODE_AHEAD, threads=None, **render_options):
+    """
+    Yield items unchanged, each once the illustrations of its card are in the
+    renderer's asset cache.
+
+    Illustrations of the next ahead items are decoded on a thread pool, at the
+    size they are drawn at with render_options (see CardRenderer.render_card),
+    while the loop renders the current card. items are cards, or anything
+    card_of(item) maps to the card it renders or None when it renders none.
+    Templates without an illustration layer get items straight through.
+    """
+    if not renderer.template.render_plan().illustrations:
+        yield from items
+        return
+
+    # Imported here, like the export process pool, to keep it out of startup
+    from concurrent.futures import ThreadPoolExecutor
+
+    pending = deque()  # (item, future decoding its illustrations or None)
+    with ThreadPoolExecutor(threads or default_decode_threads(), thread_name_prefix="illustration decode") as pool:
+        for item in items:
+            card = card_of(item) if card_of else item
+            future = pool.submit(renderer.load_illustrations, card, **render_options) if card is not None else None
+            pending.append((item, future))
+            if len(pending) > ahead:
+                yield _decoded(*pending.popleft())
+        while pending:
+            yield _decoded(*pending.popleft())
+
+
+def _decoded(item, future):
+    if future is not None:
+        future.result()
+    return item
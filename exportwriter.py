@@ -0,0 +1,96 @@
+# exportwriter.py
+import queue
+import threading
+
+from PyQt6.QtCore import QBuffer, QByteArray, QIODevice
+
+WRITE_QUEUE_SIZE = 4  # Rendered cards waiting to be written, bounds the memory of an export
+FILE_BUFFER_SIZE = 1 << 20  # Bytes gathered per file write, few large writes suit network shares
+
+
+class BackgroundWriter:
+    """
+    Thread running write jobs, in order, behind a bounded queue.
+
+    An export renders a card, submits the job that encodes and writes it and
+    goes on with the next card, so rendering overlaps encoding and disk I/O.
+    submit blocks while max_pending jobs are waiting, which keeps memory flat
+    when the disk is slower than rendering (e.g. a network share). The first
+    error a job raises is raised again by submit or close and the jobs after
+    it are skipped. Always call close, it waits for the queued jobs.
+    """
+
+    def __init__(self, max_pending=WRITE_QUEUE_SIZE):
+        self._queue = queue.Queue(max_pending)
+        self._error = None
+        self._raised = False
+        self._thread = threading.Thread(target=self._run, name="export writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, job, *args):
+        self._raise_error()
+        self._queue.put((job, args))
+
+    def wait(self):
+        """Block until every job submitted so far has run"""
+        self._queue.join()
+        self._raise_error()
+
+    def close(self):
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+        self._raise_error()
+
+    def _raise_error(self):
+        if self._error is not None and not self._raised:
+            self._raised = True
+            raise self._error
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                self._queue.task_done()
+                return
+            job, args = item
+            try:
+                if self._error is None:  # Else keep draining so submit never blocks for good
+                    job(*args)
+            except Exception as e:
+                self._error = e
+            finally:
+                self._queue.task_done()
+
+
+class StreamedFile:
+    """
+    File that a Qt writer (QPdfWriter) streams to, written by a BackgroundWriter.
+
+    Qt writes into the in-memory device; after every page (or card) call
+    flush to hand what was written so far to the writer thread and start the
+    buffer over, so only a few pages are held in memory at once. close
+    writes the rest and waits for the file to be complete.
+    """
+
+    def __init__(self, file_name):
+        self._file = open(file_name, "wb", buffering=FILE_BUFFER_SIZE)
+        self._data = QByteArray()
+        self.device = QBuffer(self._data)
+        self.device.open(QIODevice.OpenModeFlag.WriteOnly)
+        self._writer = BackgroundWriter()
+
+    def flush(self):
+        if self._data.size():
+            chunk = self._data.data()
+            self._data.clear()
+            self.device.seek(0)  # Qt keeps its own file offsets, the buffer only holds new bytes
+            self._writer.submit(self._file.write, chunk)
+
+    def close(self):
+        try:
+            self.flush()
+            self.device.close()
+            self._writer.close()
+        finally:
+            self._file.close()
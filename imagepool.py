@@ -0,0 +1,56 @@
+# imagepool.py
+import threading
+from collections import deque
+
+from PyQt6.QtGui import QImage
+
+CANVAS_FORMAT = QImage.Format.Format_ARGB32_Premultiplied  # The format QPainter blends in, painting converts nothing
+POOL_SIZE = 6  # Released canvases kept, an export writer queue's worth of cards plus the ones being rendered
+
+
+class ImagePool:
+    """
+    Card canvases handed back by finished renders for the next render to paint in.
+
+    acquire returns a released image of the requested size if there is one,
+    else a new one, with its pixels as they are; the caller clears or
+    overwrites them. Release an image once nothing reads it any more (e.g.
+    after it was encoded), images that are never released are simply not
+    reused. Implicit sharing keeps reuse safe: painting a released image
+    that someone still holds a copy of copies it instead of changing theirs.
+    """
+
+    def __init__(self, max_images=POOL_SIZE):
+        self.max_images = max_images
+        self.allocated = 0
+        self.reused = 0
+        self._images = deque()
+        self._lock = threading.Lock()
+
+    def acquire(self, width, height):
+        with self._lock:
+            for image in self._images:
+                if image.width() == width and image.height() == height:
+                    self._images.remove(image)
+                    self.reused += 1
+                    return image
+            self.allocated += 1
+        return QImage(width, height, CANVAS_FORMAT)
+
+    def release(self, image):
+        if image is None or image.format() != CANVAS_FORMAT:
+            return
+        with self._lock:
+            if any(pooled is image for pooled in self._images):
+                return
+            self._images.append(image)
+            while len(self._images) > self.max_images:
+                self._images.popleft()  # Oldest first, it may be of a size no longer rendered
+
+    def clear(self):
+        with self._lock:
+            self._images.clear()
+
+    def stats(self):
+        with self._lock:
+            return {"allocated": self.allocated, "reused": self.reused, "pooled": len(self._images)}
@@ -0,0 +1,152 @@
+# imposition.py
+import math
+
+from PyQt6.QtCore import Qt, QLineF, QRectF
+from PyQt6.QtGui import QPen, QColor
+
+PRINT_DPI = 300  # Card pixels are laid out at the printing resolution
+MIN_SHEET_MARGIN = 0.25  # Inches of paper kept clear around the card grid
+CROP_MARK_LENGTH = 0.125  # Inches
+CROP_MARK_OFFSET = 0.0625  # Inches between the bleed edge and the start of a crop mark
+CROP_MARK_WIDTH = 0.5  # Points
+ATLAS_COLUMNS = 10  # The largest deck sheet grid Tabletop Simulator imports
+ATLAS_ROWS = 7
+MAX_SHEET_BYTES = 1 << 30  # Largest atlas sheet allocated, 4 bytes a pixel
+
+
+def scaled_size(width, height, scale):
+    """Pixel size of a width x height card rendered at scale"""
+    if scale == 1.0:
+        return width, height
+    return max(1, math.ceil(width * scale)), max(1, math.ceil(height * scale))
+
+
+class SheetLayout:
+    """
+    Grid of card slots on a printed sheet, in device pixels at dpi.
+
+    Each slot holds a card with its bleed. The grid is centred on the page and
+    crop marks are drawn in the margin around it, lined up with the trim edges.
+    """
+
+    def __init__(self, page_size, card_width, card_height, bleed, gutter=0, crop_marks=True, dpi=PRINT_DPI):
+        points = page_size.sizePoints()
+        self.dpi = dpi
+        self.page_width = points.width() * dpi / 72
+        self.page_height = points.height() * dpi / 72
+        self.card_width = card_width
+        self.card_height = card_height
+        self.bleed = bleed
+        self.gutter = gutter
+        self.crop_marks = crop_marks
+        self.cell_width = card_width + 2 * bleed
+        self.cell_height = card_height + 2 * bleed
+
+        margin = MIN_SHEET_MARGIN * dpi
+        if crop_marks:
+            margin = max(margin, (CROP_MARK_OFFSET + CROP_MARK_LENGTH) * dpi)
+        self.columns = max(0, int((self.page_width - 2 * margin + gutter) // (self.cell_width + gutter)))
+        self.rows = max(0, int((self.page_height - 2 * margin + gutter) // (self.cell_height + gutter)))
+
+        self.grid_width = self.columns * self.cell_width + max(0, self.columns - 1) * gutter
+        self.grid_height = self.rows * self.cell_height + max(0, self.rows - 1) * gutter
+        self.left = (self.page_width - self.grid_width) / 2
+        self.top = (self.page_height - self.grid_height) / 2
+
+    @property
+    def cards_per_sheet(self):
+        return self.columns * self.rows
+
+    def slot_rect(self, slot, back=False):
+        """
+        Rectangle of a slot including bleed. Backs are mirrored left to right so a
+        sheet flipped on its long edge puts every back behind its front.
+        """
+        row, column = divmod(slot, self.columns)
+        if back:
+            column = self.columns - 1 - column
+        return QRectF(
+            self.left + column * (self.cell_width + self.gutter),
+            self.top + row * (self.cell_height + self.gutter),
+            self.cell_width,
+            self.cell_height,
+        )
+
+    def trim_lines(self):
+        """x and y positions of every card's trim edges"""
+        xs, ys = [], []
+        for column in range(self.columns):
+            x = self.left + column * (self.cell_width + self.gutter) + self.bleed
+            xs += [x, x + self.card_width]
+        for row in range(self.rows):
+            y = self.top + row * (self.cell_height + self.gutter) + self.bleed
+            ys += [y, y + self.card_height]
+        return xs, ys
+
+    def draw_crop_marks(self, painter):
+        if not self.crop_marks or not self.cards_per_sheet:
+            return
+
+        offset = CROP_MARK_OFFSET * self.dpi
+        length = CROP_MARK_LENGTH * self.dpi
+        right = self.left + self.grid_width
+        bottom = self.top + self.grid_height
+
+        pen = QPen(QColor("black"))
+        pen.setWidthF(CROP_MARK_WIDTH * self.dpi / 72)
+        pen.setCapStyle(Qt.PenCapStyle.FlatCap)
+        painter.save()
+        painter.setPen(pen)
+        xs, ys = self.trim_lines()
+        for x in xs:
+            painter.drawLine(QLineF(x, self.top - offset - length, x, self.top - offset))
+            painter.drawLine(QLineF(x, bottom + offset, x, bottom + offset + length))
+        for y in ys:
+            painter.drawLine(QLineF(self.left - offset - length, y, self.left - offset, y))
+            painter.drawLine(QLineF(right + offset, y, right + offset + length, y))
+        painter.restore()
+
+
+class AtlasLayout:
+    """
+    Grid of card tiles on an atlas sheet image, in pixels.
+
+    Tiles are cards rendered at scale, packed edge to edge in rows from the
+    top left. max_sheet_size caps both sides of a sheet and max_sheet_bytes
+    its memory: columns and rows are dropped until the grid fits, tiles are
+    never shrunk to fit.
+    """
+
+    def __init__(
+        self,
+        card_width,
+        card_height,
+        columns=ATLAS_COLUMNS,
+        rows=ATLAS_ROWS,
+        scale=1.0,
+        max_sheet_size=None,
+        max_sheet_bytes=MAX_SHEET_BYTES,
+    ):
+        self.scale = scale
+        self.tile_width, self.tile_height = scaled_size(card_width, card_height, scale)
+        if max_sheet_size:
+            columns = min(columns, max_sheet_size // self.tile_width)
+            rows = min(rows, max_sheet_size // self.tile_height)
+        tiles = max_sheet_bytes // (self.tile_width * self.tile_height * 4)
+        if columns * rows > tiles:
+            # Keep full rows where possible, else as many columns as fit in one row
+            columns = min(columns, tiles)
+            rows = min(rows, tiles // columns) if columns else 0
+        self.columns = max(0, columns)
+        self.rows = max(0, rows)
+        self.sheet_width = self.columns * self.tile_width
+        self.sheet_height = self.rows * self.tile_height
+
+    @property
+    def cards_per_sheet(self):
+        return self.columns * self.rows
+
+    def tile_position(self, slot):
+        """Top left pixel of a slot on its sheet"""
+        row, column = divmod(slot, self.columns)
+        return column * self.tile_width, row * self.tile_height
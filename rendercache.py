@@ -0,0 +1,172 @@
+# rendercache.py
+import hashlib
+import json
+import os
+import shutil
+import threading
+
+from assetcache import file_key
+
+MANIFEST_FILE = "manifest.json"
+CACHE_DIR = ".render_cache"
+CACHE_FORMAT = 7  # Bump when cards are drawn differently, so older renders are not reused
+IMAGE_SUFFIXES = (".png", ".jpg", ".jpeg", ".bmp", ".gif", ".webp", ".svg")
+
+
+def template_digest(template, **render_options):
+    """Hash of everything every card render takes from the template, asset files included"""
+    paths = [layer.get("path") for layer in template.layers]
+    paths.append(getattr(template, "card_image_path", None))
+    data = {
+        "format": CACHE_FORMAT,
+        "template": template.to_dict(),
+        "assets": [file_key(path) for path in paths if path],
+        "options": render_options,
+    }
+    return hashlib.sha256(json.dumps(data, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def card_digest(template_hash, card):
+    """Hash of one card row on top of template_hash, including image files the row points to"""
+    assets = [
+        file_key(value)
+        for value in card.values()
+        if isinstance(value, str) and value.lower().endswith(IMAGE_SUFFIXES)
+    ]
+    data = json.dumps([template_hash, card, assets], sort_keys=True, default=str)
+    return hashlib.sha256(data.encode()).hexdigest()
+
+
+def store_render(data, cache_dir, key, path):
+    """Save an encoded card under its key in cache_dir and place it at path"""
+    cached = _cached_path(cache_dir, key, path)
+    temp = _temp_name(cached)
+    with open(temp, "wb") as f:
+        f.write(data)
+    os.replace(temp, cached)
+    _place(cached, path)
+
+
+def _cached_path(cache_dir, key, path):
+    # Cached renders keep the suffix of the card files, PNG, JPEG, WebP or TIFF
+    return os.path.join(cache_dir, key + os.path.splitext(path)[1])
+
+
+def _place(cached, path):
+    temp = _temp_name(path)
+    try:
+        os.link(cached, temp)
+    except OSError:
+        shutil.copyfile(cached, temp)  # File system without hard links
+    os.replace(temp, path)
+
+
+def _temp_name(path):
+    # Unique per thread and process, parallel exports may write the same key at once
+    return f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+
+class RenderCache:
+    """
+    Content-addressed cache of rendered cards for one image export directory.
+
+    Each card is keyed by a hash of its row, the template JSON and the mtimes of
+    the assets they reference. Renders are kept by key in .render_cache and the
+    card files are hard links (or copies) of them, so a re-export only renders
+    cards with a new key. A file that already holds its card is kept and any
+    other card seen before is restored from the cache. manifest.json in the
+    directory maps every card file to its key.
+    """
+
+    def __init__(self, dir_name, template, **render_options):
+        # render_options (e.g. the encoding) are part of every key
+        self.dir_name = dir_name
+        self.cache_dir = os.path.join(dir_name, CACHE_DIR)
+        self.manifest_path = os.path.join(dir_name, MANIFEST_FILE)
+        self.template_hash = template_digest(template, **render_options)
+        self.kept = 0
+        self.restored = 0
+        self.rendered = 0
+        self._lock = threading.Lock()
+        self._files = self._load_manifest()  # card file name -> key
+        self._recorded = set()  # Card file names this export has written or kept
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def card_key(self, card):
+        return card_digest(self.template_hash, card)
+
+    def holds(self, path, key):
+        """True if reuse(path, key) would succeed, without placing anything"""
+        with self._lock:
+            current = self._files.get(os.path.basename(path)) == key
+        if current and os.path.exists(path):
+            return True
+        return os.path.exists(_cached_path(self.cache_dir, key, path))
+
+    def reuse(self, path, key):
+        """
+        Make path hold the card rendered for key without rendering it, returns
+        False if the card has never been rendered and has to be.
+        """
+        with self._lock:
+            current = self._files.get(os.path.basename(path)) == key
+        if current and os.path.exists(path):
+            self.record(path, key, "kept")
+            return True
+
+        cached = _cached_path(self.cache_dir, key, path)
+        if not os.path.exists(cached):
+            return False
+        _place(cached, path)
+        self.record(path, key, "restored")
+        return True
+
+    def store(self, data, path, key):
+        store_render(data, self.cache_dir, key, path)
+        self.record(path, key)
+
+    def record(self, path, key, outcome="rendered"):
+        with self._lock:
+            self._files[os.path.basename(path)] = key
+            self._recorded.add(os.path.basename(path))
+            setattr(self, outcome, getattr(self, outcome) + 1)
+
+    def summary(self):
+        return f"{self.rendered} rendered, {self.kept} unchanged, {self.restored} restored from cache"
+
+    def save(self, prune=False):
+        """
+        Write the manifest. prune also forgets and deletes the card files of
+        earlier exports this one did not write (the deck got shorter) and the
+        cached renders no card file uses, only pass it once every card of the
+        deck has been exported.
+        """
+        with self._lock:
+            stale = [name for name in self._files if name not in self._recorded] if prune else []
+            for name in stale:
+                del self._files[name]
+            files = dict(self._files)
+        try:
+            for name in stale:
+                path = os.path.join(self.dir_name, name)
+                if os.path.exists(path):
+                    os.remove(path)
+            with open(self.manifest_path, "w") as f:
+                json.dump({"format": CACHE_FORMAT, "cards": files}, f, indent=4, sort_keys=True)
+            if prune:
+                used = set(files.values())
+                for name in os.listdir(self.cache_dir):
+                    if os.path.splitext(name)[0] not in used:
+                        os.remove(os.path.join(self.cache_dir, name))
+        except OSError as e:
+            print(f"Failed to save render cache: {e}")
+
+    def _load_manifest(self):
+        try:
+            with open(self.manifest_path) as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(manifest, dict) or manifest.get("format") != CACHE_FORMAT:
+            return {}
+        return dict(manifest.get("cards", {}))
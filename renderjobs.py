@@ -0,0 +1,144 @@
+# renderjobs.py
+import math
+import threading
+from functools import partial
+
+from PyQt6.QtCore import QObject, pyqtSignal
+from PyQt6.QtGui import QImage
+
+import cardexport
+
+CHUNKS_PER_THREAD = 4  # Smaller chunks balance threads and let cancel take effect sooner
+
+
+class RenderJob(QObject):
+    """
+    Cancellable batch of render tasks running on a QThreadPool.
+
+    Signals are emitted from pool threads and delivered on the thread the job
+    lives on (normally the GUI thread). finished is emitted once, after every
+    task has returned, with True only if the job ran to completion.
+    """
+
+    card_rendered = pyqtSignal(int, QImage)  # card index, rendered image
+    progress = pyqtSignal(int, int)  # cards done, total cards
+    failed = pyqtSignal(str)
+    finished = pyqtSignal(bool)
+
+    def __init__(self, tasks, total, parent=None):
+        super().__init__(parent)
+        self.tasks = list(tasks)
+        self.total = total
+        self.done = 0
+        self.error = None
+        self._cancel_event = threading.Event()
+        self._finished_event = threading.Event()
+        self._lock = threading.Lock()
+        self._pending = 0
+
+    def cancel(self):
+        self._cancel_event.set()
+
+    def is_cancelled(self):
+        return self._cancel_event.is_set()
+
+    def is_finished(self):
+        return self._finished_event.is_set()
+
+    def start(self, pool, priority=0):
+        """
+        Run each task(job) on pool, queued ahead of runnables with a lower priority.
+        Connect the signals before calling this, tasks may finish before it returns.
+        """
+        self._pending = len(self.tasks)
+        if not self.tasks:
+            self._finished_event.set()
+            self.finished.emit(True)
+            return
+        for task in self.tasks:
+            pool.start(partial(self._run_task, task), priority)
+
+    def card_done(self, *_):
+        with self._lock:
+            self.done += 1
+            done = self.done
+        self.progress.emit(done, self.total)
+
+    def _run_task(self, task):
+        try:
+            task(self)
+        except Exception as e:
+            with self._lock:
+                first_error = self.error is None
+                self.error = self.error or str(e)
+            self.cancel()
+            if first_error:
+                self.failed.emit(str(e))
+        finally:
+            with self._lock:
+                self._pending -= 1
+                last = self._pending == 0
+            if last:
+                self._finished_event.set()
+                self.finished.emit(not self.is_cancelled())
+
+
+def preview_job(renderer, card, index, target_size=None, **render_options):
+    """
+    Job rendering one card off the GUI thread, the image arrives through card_rendered.
+    With target_size the card is rendered directly at the size that fits it.
+    """
+    def task(job):
+        if job.is_cancelled():
+            return
+        image = renderer.render_card(card, target_size=target_size, **render_options)
+        if not job.is_cancelled():
+            job.card_rendered.emit(index, image)
+
+    return RenderJob([task], 1)
+
+
+def png_export_job(renderer, cards, dir_name, threads, cache=None, encoding=cardexport.DEFAULT_ENCODING):
+    """
+    Job exporting cards as card_<n> images in the cardexport.ImageEncoding format,
+    split into chunks for threads pool threads.
+    With a rendercache.RenderCache unchanged cards are skipped and the manifest is
+    written when the job finishes.
+    """
+    cards = list(cards)
+    chunk_size = max(1, math.ceil(len(cards) / (max(1, threads) * CHUNKS_PER_THREAD)))
+
+    def task(start, chunk, job):
+        cardexport.export_png(
+            renderer, chunk, dir_name, first_index=start, progress=job.card_done, cancelled=job.is_cancelled,
+            cache=cache, encoding=encoding
+        )
+
+    tasks = [partial(task, start, cards[start:start + chunk_size]) for start in range(0, len(cards), chunk_size)]
+    job = RenderJob(tasks, len(cards))
+    if cache is not None:
+        job.finished.connect(lambda completed: cache.save(prune=completed))
+    return job
+
+
+def pdf_export_job(renderer, cards, file_name, page_size, sheet_options=None, vector=False):
+    """
+    Job exporting cards to a PDF on one pool thread, pages have to be written in order.
+    sheet_options are passed to cardexport.export_pdf_sheets to impose several cards
+    per page; without them every card gets its own page.
+    """
+    cards = list(cards)
+
+    def task(job):
+        if sheet_options is not None:
+            cardexport.export_pdf_sheets(
+                renderer, cards, file_name, page_size,
+                vector=vector, progress=job.card_done, cancelled=job.is_cancelled, **sheet_options
+            )
+        else:
+            cardexport.export_pdf(
+                renderer, cards, file_name, page_size,
+                vector=vector, progress=job.card_done, cancelled=job.is_cancelled
+            )
+
+    return RenderJob([task], len(cards))
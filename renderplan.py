@@ -0,0 +1,129 @@
+# renderplan.py
+from PyQt6.QtCore import QRectF
+from PyQt6.QtGui import QColor, QFont
+
+FIELD_FONT_PIXEL_SIZE = 32  # 24 pt at the 96 DPI of a default QImage, in card pixels
+DEFAULT_FONT = "Default"
+
+# LayerOp kinds
+SVG_LAYER = "svg"
+IMAGE_LAYER = "png"
+ILLUSTRATION_LAYER = "illustration"
+
+
+def ordered_layers(layers):
+    """Layers in drawing order: by their "order" key, layers without one keep their list position"""
+    def key(item):
+        index, layer = item
+        order = layer.get("order")
+        return (order if isinstance(order, (int, float)) else index, index)
+
+    return [layer for _, layer in sorted(enumerate(layers), key=key)]
+
+
+class LayerOp:
+    """One visible template layer, ready to draw"""
+
+    __slots__ = ("kind", "path", "layer_id", "x", "y", "size")
+
+    def __init__(self, kind, layer):
+        self.kind = kind
+        self.path = layer.get("path", "") or ""
+        self.layer_id = layer.get("id")
+        self.x, self.y = layer.get("position", (0, 0))
+        self.size = tuple(layer["size"]) if layer.get("size") else None  # Illustration box, else the rest of the card
+
+    def position(self, use_provided_positions=False, provided_positions=None):
+        if use_provided_positions:
+            return provided_positions.get(self.layer_id, (0, 0))
+        return self.x, self.y
+
+    def static_key(self):
+        return (self.kind, self.path, self.x, self.y)
+
+
+class FieldOp:
+    """A data field, with its text rect when the template positions it"""
+
+    __slots__ = ("name", "position", "rect")
+
+    def __init__(self, name, position, text_size):
+        self.name = name
+        self.position = tuple(position) if position else None  # None: from the provided positions of each render
+        self.rect = QRectF(position[0], position[1], *text_size) if position else None
+
+    def text_rect(self, text_size, provided_positions):
+        if self.rect is not None:
+            return self.rect
+        pos_x, pos_y = provided_positions.get(self.name, (0, 0))
+        return QRectF(pos_x, pos_y, *text_size)
+
+
+class RenderPlan:
+    """
+    A CardTemplate compiled for rendering.
+
+    Layers are sorted by their "order" key with hidden ones dropped, and
+    positions, fonts, text rects and colors are resolved once, so each card
+    only replays the ops. Built by CardTemplate.render_plan and never changed
+    afterwards, which lets render threads share it while the editor changes
+    the template; an edit compiles a new plan.
+    """
+
+    __slots__ = (
+        "width", "height", "bleed", "card_image_path", "layers", "static_layers", "dynamic_layers",
+        "static_key", "illustrations", "fields", "text_size", "text_color", "_fonts", "_fallback_font",
+    )
+
+    def __init__(self, template):
+        self.width = template.width
+        self.height = template.height
+        self.bleed = template.bleed
+        self.card_image_path = template.card_image_path or ""
+
+        self.layers = tuple(
+            LayerOp(_layer_kind(layer), layer)
+            for layer in ordered_layers(template.layers)
+            if layer.get("visible", True) and _layer_kind(layer) is not None
+        )
+        # Layers looking the same on every card lead the stack, from the first card-dependent one on they are drawn per card
+        split = next(
+            (index for index, op in enumerate(self.layers) if op.kind == ILLUSTRATION_LAYER or not op.path),
+            len(self.layers),
+        )
+        self.static_layers = self.layers[:split]
+        self.dynamic_layers = self.layers[split:]
+        self.static_key = tuple(op.static_key() for op in self.static_layers)
+        self.illustrations = tuple(op for op in self.layers if op.kind == ILLUSTRATION_LAYER)
+
+        # Text boxes cover the card without its bleed, whether or not the bleed is rendered
+        self.text_size = (self.width, self.height)
+        self.fields = tuple(
+            FieldOp(field, template.data_field_positions.get(field), self.text_size)
+            for field in template.data_fields
+        )
+        self.text_color = QColor("black")
+        self._fonts = {name: _field_font(font_id) for name, font_id in template.fonts.items()}
+        self._fallback_font = _field_font(DEFAULT_FONT)  # For font names the template has no font for
+
+    def card_size(self, include_bleed=False):
+        if include_bleed:
+            return self.width + 2 * self.bleed, self.height + 2 * self.bleed
+        return self.width, self.height
+
+    def field_font(self, name=DEFAULT_FONT):
+        return self._fonts.get(name, self._fallback_font)
+
+
+def _layer_kind(layer):
+    if layer.get("card_illustration"):
+        return ILLUSTRATION_LAYER
+    if layer.get("type") in (SVG_LAYER, IMAGE_LAYER):
+        return layer["type"]
+    return None  # Drawn as nothing before plans existed either
+
+
+def _field_font(font_id):
+    font = QFont(font_id)
+    font.setPixelSize(FIELD_FONT_PIXEL_SIZE)
+    return font
@@ -0,0 +1,119 @@
+# renderprofiler.py
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Stages timed while rendering and exporting cards
+CARD = "card"  # A whole render_card or PDF card, the stages below run inside it
+ASSET_LOAD = "asset load"
+SVG_RASTERIZE = "svg rasterize"
+PIXMAP_DRAW = "pixmap draw"
+TEXT_DRAW = "text draw"
+ENCODE = "encode"
+WRITE = "write"
+
+MAX_TRACE_EVENTS = 200000  # Events kept for the Chrome trace, totals keep counting past it
+
+
+class RenderProfiler:
+    """
+    Opt-in timing of render and export stages.
+
+    Give one to CardRenderer.profiler and every stage it runs is timed and
+    summed per stage and label (a layer path, a field name or an output
+    file), so a slow deck shows whether an illustration, an SVG or image
+    encoding is to blame. Stages may be timed from several threads at once.
+    """
+
+    def __init__(self, max_trace_events=MAX_TRACE_EVENTS):
+        self.max_trace_events = max_trace_events
+        self.dropped_events = 0
+        self._totals = {}  # (stage, label) -> [count, total seconds, max seconds]
+        self._events = []  # (stage, label, start, duration, thread id)
+        self._origin = time.perf_counter()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, stage, label=""):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, label, start, time.perf_counter() - start)
+
+    def record(self, stage, label, start, duration):
+        with self._lock:
+            totals = self._totals.get((stage, label))
+            if totals is None:
+                self._totals[(stage, label)] = [1, duration, duration]
+            else:
+                totals[0] += 1
+                totals[1] += duration
+                totals[2] = max(totals[2], duration)
+            if len(self._events) < self.max_trace_events:
+                self._events.append((stage, label, start, duration, threading.get_ident()))
+            else:
+                self.dropped_events += 1
+
+    def summary(self):
+        """Per stage and label totals, slowest total first"""
+        with self._lock:
+            totals = list(self._totals.items())
+        rows = [
+            {
+                "stage": stage,
+                "label": label,
+                "count": count,
+                "total_ms": total * 1000,
+                "mean_ms": total * 1000 / count,
+                "max_ms": longest * 1000,
+            }
+            for (stage, label), (count, total, longest) in totals
+        ]
+        rows.sort(key=lambda row: row["total_ms"], reverse=True)
+        return rows
+
+    def stage_totals(self):
+        """Total milliseconds per stage over every label"""
+        totals = {}
+        for row in self.summary():
+            totals[row["stage"]] = totals.get(row["stage"], 0) + row["total_ms"]
+        return totals
+
+    def chrome_trace(self):
+        """The recorded events in Chrome trace event format (chrome://tracing, Perfetto)"""
+        with self._lock:
+            events = list(self._events)
+        pid = os.getpid()
+        return {
+            "traceEvents": [
+                {
+                    "name": label or stage,
+                    "cat": stage,
+                    "ph": "X",
+                    "ts": (start - self._origin) * 1e6,
+                    "dur": duration * 1e6,
+                    "pid": pid,
+                    "tid": thread,
+                }
+                for stage, label, start, duration, thread in events
+            ],
+            "displayTimeUnit": "ms",
+        }
+
+    def save_json(self, file_name):
+        with open(file_name, "w") as f:
+            json.dump({"stages": self.stage_totals(), "details": self.summary()}, f, indent=4)
+
+    def save_chrome_trace(self, file_name):
+        with open(file_name, "w") as f:
+            json.dump(self.chrome_trace(), f)
+
+    def clear(self):
+        with self._lock:
+            self._totals.clear()
+            self._events.clear()
+            self.dropped_events = 0
+            self._origin = time.perf_counter()
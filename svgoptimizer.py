@@ -0,0 +1,250 @@
+# svgoptimizer.py
+import re
+import xml.etree.ElementTree as ET
+
+SVG_NS = "http://www.w3.org/2000/svg"
+XLINK_NS = "http://www.w3.org/1999/xlink"
+EDITOR_NAMESPACES = (  # Attributes only editors read, they do not keep a group from collapsing
+    "http://www.inkscape.org/namespaces/inkscape",
+    "http://sodipodi.sourceforge.net/DTD/sodipodi-0.dtd",
+)
+INHERITED_PROPERTIES = ("fill", "fill-opacity", "stroke", "stroke-opacity", "stroke-width", "visibility")
+CONTAINERS = ("svg", "g")  # Children of anything else (defs, clipPath, mask, ...) are left alone
+EFFECTS = ("opacity", "filter", "mask", "clip-path")  # Properties that keep later shapes from hiding earlier ones
+OWN_PROPERTIES = EFFECTS + ("display",)  # Read from each element, never inherited
+
+# Written back with the usual prefixes, Qt matches SVG elements in the default namespace
+for _prefix, _uri in zip(("", "xlink", "inkscape", "sodipodi"), (SVG_NS, XLINK_NS) + EDITOR_NAMESPACES):
+    ET.register_namespace(_prefix, _uri)
+
+_NUMBER = re.compile(r"^\s*([-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)(?:px)?\s*$")
+_RGB_COMPONENT = r"[-+]?(?:\d+\.?\d*|\.\d+)%?"
+# Exactly three components, comma or space separated: a fourth or a "/ alpha" may be translucent
+_OPAQUE_RGB = (
+    r"rgb\(\s*" + _RGB_COMPONENT
+    + r"(?:\s*,\s*" + _RGB_COMPONENT + r"\s*,\s*|\s+" + _RGB_COMPONENT + r"\s+)"
+    + _RGB_COMPONENT + r"\s*\)"
+)
+_OPAQUE_COLOR = re.compile(r"^\s*(#[0-9a-fA-F]{3}|#[0-9a-fA-F]{6}|" + _OPAQUE_RGB + r"|[a-zA-Z]+)\s*$")
+_REFERENCE = re.compile(r"url\(\s*#([^)\s]+)\s*\)")
+
+
+def optimize_svg(data):
+    """
+    Return the SVG document data with elements that cannot change its pixels removed.
+
+    Drops shapes a later opaque rectangle in the same group paints over
+    entirely (which includes stacked duplicates of one rectangle) and
+    unwraps groups that carry nothing but editor metadata, so QSvgRenderer
+    has fewer elements to walk and paint on every render. Antialiased edges
+    of removed duplicates no longer build up, otherwise the image is
+    unchanged. Returns data itself when nothing could be removed or the
+    document is one this pass does not handle (not parsable, or referencing
+    files relative to its own path).
+    """
+    try:
+        root = ET.fromstring(data)
+    except ET.ParseError:
+        return data
+    if _local_name(root) != "svg" or _has_external_references(root):
+        return data
+
+    referenced = _referenced_ids(root)
+    removed = _optimize_container(root, {}, referenced)
+    if not removed:
+        return data
+    return ET.tostring(root, encoding="utf-8", xml_declaration=True)
+
+
+def _optimize_container(container, inherited, referenced, under_effect=False):
+    """Optimize container and its nested groups, returns the number of elements removed"""
+    if not _is_displayed(container):
+        return 0  # Nothing in it is drawn, so nothing in it hides anything
+    removed = _collapse_groups(container, referenced)
+    style = _computed_style(container, inherited)
+    # Group opacity or masks may be applied to each child on its own, where hiding does not hold
+    under_effect = under_effect or _has_effect(container)
+    if not under_effect:
+        removed += _remove_occluded(container, style, referenced)
+    for child in container:
+        if _local_name(child) in CONTAINERS:
+            removed += _optimize_container(child, style, referenced, under_effect)
+    return removed
+
+
+def _collapse_groups(container, referenced):
+    """Replace plain groups with their children and drop empty ones"""
+    removed = 0
+    index = 0
+    while index < len(container):
+        child = container[index]
+        if _local_name(child) == "g" and _is_plain_group(child, referenced):
+            container[index:index + 1] = list(child)  # Their children are checked in turn
+            removed += 1
+        else:
+            index += 1
+    return removed
+
+
+def _is_plain_group(group, referenced):
+    for name in group.attrib:
+        if name == "id":
+            if group.attrib[name] in referenced:
+                return False
+        elif not name.startswith("{") or name[1:].split("}")[0] not in EDITOR_NAMESPACES:
+            return False
+    return True
+
+
+def _remove_occluded(container, inherited, referenced):
+    covers = []  # Opaque areas of later siblings, walking back to front
+    keep = []
+    removed = 0
+    for element in reversed(list(container)):
+        style = _computed_style(element, inherited)
+        bounds = _painted_bounds(element, style)
+        hidden = bounds is not None and any(_contains(cover, bounds) for cover in covers)
+        if hidden and element.get("id") not in referenced:
+            removed += 1
+            continue
+        keep.append(element)
+        cover = _opaque_area(element, style)
+        if cover is not None:
+            covers.append(cover)
+    if removed:
+        container[:] = list(reversed(keep))
+    return removed
+
+
+def _painted_bounds(element, style):
+    """(left, top, right, bottom) of everything a simple shape paints, None if unknown"""
+    if _has_effect(element) or element.get("transform") or _local_name(element) in CONTAINERS:
+        return None
+    if style.get("display") == "none":
+        return None
+    geometry = _geometry(element)
+    if geometry is None:
+        return None
+    margin = 0
+    if _paint(style.get("stroke")) != "none":
+        width = _number(style.get("stroke-width", "1"))
+        if width is None:
+            return None
+        margin = width / 2
+    left, top, right, bottom = geometry
+    return (left - margin, top - margin, right + margin, bottom + margin)
+
+
+def _opaque_area(element, style):
+    """Area a plain rectangle paints fully opaque, None for anything else"""
+    if _local_name(element) != "rect" or element.get("rx") or element.get("ry"):
+        return None
+    if _has_effect(element) or element.get("transform") or style.get("visibility", "visible") != "visible":
+        return None
+    if style.get("display") == "none":
+        return None
+    if not _is_opaque(style.get("fill", "black"), style.get("fill-opacity")):
+        return None
+    area = _geometry(element)
+    if area is not None and _is_opaque(style.get("stroke", "none"), style.get("stroke-opacity")):
+        margin = _number(style.get("stroke-width", "1"))
+        if margin is not None:
+            left, top, right, bottom = area
+            area = (left - margin / 2, top - margin / 2, right + margin / 2, bottom + margin / 2)
+    return area
+
+
+def _geometry(element):
+    name = _local_name(element)
+    if name == "rect":
+        x, y, width, height = (_number(element.get(key, "0")) for key in ("x", "y", "width", "height"))
+        if None in (x, y, width, height):
+            return None
+        return (x, y, x + width, y + height)
+    if name in ("circle", "ellipse"):
+        cx, cy = _number(element.get("cx", "0")), _number(element.get("cy", "0"))
+        rx = _number(element.get("r" if name == "circle" else "rx", "0"))
+        ry = _number(element.get("r" if name == "circle" else "ry", "0"))
+        if None in (cx, cy, rx, ry):
+            return None
+        return (cx - rx, cy - ry, cx + rx, cy + ry)
+    return None
+
+
+def _contains(outer, inner):
+    return outer[0] <= inner[0] and outer[1] <= inner[1] and outer[2] >= inner[2] and outer[3] >= inner[3]
+
+
+def _computed_style(element, inherited):
+    """Properties the optimizer reads, presentation attributes first and the style attribute over them"""
+    style = {name: value for name, value in inherited.items() if name in INHERITED_PROPERTIES}
+    for name in INHERITED_PROPERTIES + OWN_PROPERTIES:
+        if name in element.attrib:
+            style[name] = element.attrib[name].strip()
+    for declaration in element.get("style", "").split(";"):
+        name, _, value = declaration.partition(":")
+        name = name.strip()
+        if name in INHERITED_PROPERTIES + OWN_PROPERTIES:
+            style[name] = value.strip()
+    return style
+
+
+def _is_displayed(element):
+    return _computed_style(element, {}).get("display") != "none"
+
+
+def _has_effect(element):
+    if element.get("class"):
+        return True  # Stylesheet rules are not resolved here
+    style = _computed_style(element, {})
+    for name in EFFECTS:
+        value = style.get(name)
+        if value is None or value == "none":
+            continue
+        if name == "opacity" and _number(value) == 1:
+            continue
+        return True
+    return False
+
+
+def _is_opaque(paint, opacity):
+    if _paint(paint) in ("none", "transparent", "currentColor", "inherit") or paint.startswith("url("):
+        return False
+    if not _OPAQUE_COLOR.match(paint):
+        return False
+    return opacity is None or _number(opacity) == 1
+
+
+def _paint(value):
+    return (value or "none").strip()
+
+
+def _number(value):
+    match = _NUMBER.match(value or "")
+    return float(match.group(1)) if match else None
+
+
+def _local_name(element):
+    tag = element.tag if isinstance(element.tag, str) else ""
+    return tag.rsplit("}", 1)[-1]
+
+
+def _referenced_ids(root):
+    """Ids something in the document points at, those elements are never removed"""
+    ids = set()
+    for element in root.iter():
+        for name, value in element.attrib.items():
+            if name.endswith("href") and value.startswith("#"):
+                ids.add(value[1:])
+            ids.update(_REFERENCE.findall(value))
+    return ids
+
+
+def _has_external_references(root):
+    for element in root.iter():
+        if _local_name(element) == "style":
+            return True  # Stylesheets may select by structure the optimizer changes
+        for name, value in element.attrib.items():
+            if name.endswith("href") and not value.startswith(("#", "data:")):
+                return True
+    return False
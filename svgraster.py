@@ -0,0 +1,76 @@
+# svgraster.py
+import hashlib
+import os
+import threading
+
+from assetcache import AssetCache, file_key
+
+RASTER_FORMAT = 3  # Bump when SVG layers rasterize differently, so older rasters are not reused
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "cardmaker", "svg")
+
+
+class SvgRasterCache:
+    """
+    On-disk cache of SVG layers rasterized at the pixel sizes cards render at.
+
+    Rasters are PNG files named after a hash of the SVG file's contents and
+    the pixel size, so they stay valid across sessions and for every template
+    using the same artwork, and later sessions draw them instead of rendering
+    the vectors. Only raster renders use it, vector PDFs keep SVG layers as
+    vectors. Loaded rasters are kept in memory by asset_cache.
+    """
+
+    def __init__(self, dir_name=DEFAULT_CACHE_DIR, asset_cache=None):
+        self.dir_name = dir_name
+        self.asset_cache = asset_cache if asset_cache is not None else AssetCache()
+        self.rasterized = 0
+        self._digests = {}  # file_key of an SVG -> hash of its contents
+        self._lock = threading.Lock()
+        os.makedirs(dir_name, exist_ok=True)
+
+    def image(self, path, width, height, rasterize):
+        """
+        Return the SVG at path as a width x height QImage. rasterize() renders it
+        when no session has yet; None if path cannot be read.
+        """
+        digest = self._digest(path)
+        if digest is None:
+            return None
+        file_name = os.path.join(self.dir_name, f"{digest}_{width}x{height}.png")
+        if os.path.exists(file_name):
+            image = self.asset_cache.canvas_image(file_name)  # Premultiplied like a fresh raster
+            if not image.isNull():
+                return image
+
+        image = rasterize()
+        with self._lock:
+            self.rasterized += 1
+        temp = f"{file_name}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            if not image.save(temp, "PNG"):
+                raise OSError(f"cannot write {temp}")
+            os.replace(temp, file_name)
+        except OSError as e:
+            print(f"Failed to save SVG raster: {e}")
+            try:
+                os.remove(temp)
+            except OSError:
+                pass  # Never written
+        return image
+
+    def _digest(self, path):
+        key = file_key(path)
+        if key is None:
+            return None
+        with self._lock:
+            digest = self._digests.get(key)
+        if digest is None:
+            try:
+                with open(path, "rb") as f:
+                    data = f.read()
+            except OSError:
+                return None
+            digest = hashlib.sha256(b"%d:" % RASTER_FORMAT + data).hexdigest()
+            with self._lock:
+                self._digests[key] = digest
+        return digest
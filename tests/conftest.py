@@ -0,0 +1,17 @@
+# tests/conftest.py
+import os
+import sys
+
+import pytest
+
+# Must be set before Qt creates the application
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope="session")
+def app():
+    # Imported here, after the platform is set
+    from PyQt6.QtGui import QGuiApplication
+
+    return QGuiApplication.instance() or QGuiApplication(["tests"])
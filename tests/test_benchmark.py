@@ -0,0 +1,30 @@
+# tests/test_benchmark.py
+import os
+
+from PyQt6.QtGui import QImage
+from PyQt6.QtSvg import QSvgRenderer
+
+from benchmark import DEFAULT_DECK_SIZES, EXTRA_LAYERS, REPO_DIR, build_parser
+
+
+def test_suite_options_before_the_subcommand_are_kept():
+    args = build_parser().parse_args(["--startup-runs", "2", "--sizes=50", "suite"])
+    assert (args.startup_runs, args.sizes) == (2, [50])
+
+
+def test_suite_options_after_the_subcommand_win():
+    args = build_parser().parse_args(["--sizes=50", "suite", "--sizes", "9"])
+    assert args.sizes == [9]
+
+
+def test_suite_defaults_without_options():
+    assert build_parser().parse_args(["suite"]).sizes == list(DEFAULT_DECK_SIZES)
+
+
+def test_extra_layers_are_assets_that_load(app):
+    for layer in EXTRA_LAYERS:
+        path = os.path.join(REPO_DIR, layer["path"])
+        if layer["type"] == "svg":
+            assert QSvgRenderer(path).isValid(), layer["path"]
+        else:
+            assert not QImage(path).isNull(), layer["path"]
@@ -0,0 +1,21 @@
+# tests/test_carddata.py
+from carddata import CardDataStore, iter_card_chunks, iter_card_rows
+
+
+def test_byte_order_mark_is_not_part_of_the_first_header(tmp_path):
+    path = tmp_path / "cards.csv"
+    path.write_bytes("\ufeffName,Cost\nImp,1\nOgre,3\n".encode("utf-8"))
+
+    assert list(iter_card_rows(path)) == [{"Name": "Imp", "Cost": "1"}, {"Name": "Ogre", "Cost": "3"}]
+    assert [len(chunk) for chunk in iter_card_chunks(path, chunk_size=1)] == [1, 1]
+    assert CardDataStore.from_csv(path).columns == ["Name", "Cost"]
+
+
+def test_written_csv_has_no_byte_order_mark_and_reads_back(tmp_path):
+    path = tmp_path / "cards.csv"
+    store = CardDataStore.from_rows([{"Name": "Imp", "Text": "Zap, twice"}, {"Name": "Ogre", "Text": ""}])
+    store.set_value(1, store.column_index("Text"), "Smash")
+    store.write_csv(path)
+
+    assert path.read_bytes().startswith(b"Name,Text")
+    assert list(CardDataStore.from_csv(path)) == [{"Name": "Imp", "Text": "Zap, twice"}, {"Name": "Ogre", "Text": "Smash"}]
@@ -0,0 +1,51 @@
+# tests/test_carddatamodel.py
+from PyQt6.QtCore import Qt
+
+from carddata import CardDataStore
+from carddatamodel import CardDataModel
+
+
+def deck():
+    return CardDataStore.from_rows([{"Name": "Imp", "Cost": "1"}, {"Name": "Ogre", "Cost": "3"}])
+
+
+def test_model_shows_the_store(app):
+    model = CardDataModel(deck())
+    assert (model.rowCount(), model.columnCount()) == (2, 2)
+    assert model.data(model.index(1, 0)) == "Ogre"
+    assert model.headerData(1, Qt.Orientation.Horizontal) == "Cost"
+    assert model.headerData(1, Qt.Orientation.Vertical) == "2"
+
+
+def test_edit_writes_the_store_and_signals_only_its_cell(app):
+    store = deck()
+    model = CardDataModel(store)
+    changes = []
+    model.dataChanged.connect(lambda top_left, bottom_right, roles: changes.append(
+        (top_left.row(), top_left.column(), bottom_right.row(), bottom_right.column())
+    ))
+
+    assert model.setData(model.index(1, 1), "4")
+    assert store[1] == {"Name": "Ogre", "Cost": "4"}
+    assert changes == [(1, 1, 1, 1)]
+
+
+def test_unchanged_or_display_role_edits_do_nothing(app):
+    model = CardDataModel(deck())
+    changes = []
+    model.dataChanged.connect(lambda *args: changes.append(args))
+
+    assert not model.setData(model.index(0, 1), "1")
+    assert not model.setData(model.index(0, 1), "2", Qt.ItemDataRole.DisplayRole)
+    assert not changes
+    assert model.data(model.index(0, 1)) == "1"
+
+
+def test_set_store_resets_rows(app):
+    model = CardDataModel(deck())
+    resets = []
+    model.modelReset.connect(lambda: resets.append(model.rowCount()))
+
+    model.set_store(CardDataStore.from_rows([{"Name": "Imp"}]))
+    assert resets == [1]
+    assert model.columnCount() == 1
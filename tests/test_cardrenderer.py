@@ -0,0 +1,106 @@
+# tests/test_cardrenderer.py
+import os
+import threading
+import time
+
+from PyQt6.QtGui import QImage, QPainter
+
+from assetcache import AssetCache
+from cardrenderer import CardRenderer, LiveCardRenderer
+from cardtemplate import CardTemplate
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CARD_IMAGE = os.path.join(ROOT, "card_images", "character.png")
+
+
+def illustrated_template(card_image_path=CARD_IMAGE):
+    return CardTemplate({
+        "width": 200,
+        "height": 300,
+        "layers": [{"path": "", "type": "png", "card_illustration": True, "position": [0, 0]}],
+        "card_image_path": card_image_path,
+    })
+
+
+def test_missing_illustration_file_falls_back_to_template_image(app, tmp_path):
+    renderer = CardRenderer(illustrated_template())
+    card = {"Illustration": str(tmp_path / "missing.png")}
+
+    assert renderer.illustration_path(card) == CARD_IMAGE
+    image = renderer.render_card(card)
+    assert image == renderer.render_card({"Illustration": CARD_IMAGE})
+    assert image != CardRenderer(illustrated_template("")).render_card(card)
+
+
+class OneAtATimeSvg:
+    """Stands in for a cached QSvgRenderer, counting renders that overlap"""
+
+    def __init__(self):
+        self.active = 0
+        self.overlaps = 0
+
+    def render(self, painter, rect):
+        self.active += 1
+        if self.active > 1:
+            self.overlaps += 1
+        time.sleep(0.002)
+        self.active -= 1
+
+
+def test_renderers_sharing_an_asset_cache_never_render_one_svg_at_once(app):
+    svg = OneAtATimeSvg()
+    cache = AssetCache()
+    cache.svg = lambda path: svg
+    template = CardTemplate({"width": 20, "height": 20, "layers": [{"path": "a.svg", "type": "svg"}]})
+    renderers = [CardRenderer(template, asset_cache=cache) for _ in range(2)]
+
+    def render(renderer):
+        image = QImage(20, 20, QImage.Format.Format_ARGB32_Premultiplied)
+        for _ in range(10):
+            painter = QPainter(image)
+            renderer.paint_card(painter)
+            painter.end()
+
+    threads = [threading.Thread(target=render, args=(renderer,)) for renderer in renderers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert svg.overlaps == 0
+
+
+def field_template():
+    return CardTemplate({
+        "width": 300,
+        "height": 420,
+        "layers": [
+            {"path": os.path.join(ROOT, "card_back.svg"), "type": "svg", "position": [0, 0]},
+            {"path": "", "type": "png", "card_illustration": True, "position": [0, 0], "size": [300, 200]},
+        ],
+        "data_fields": ["Name", "Attack", "Text"],
+        "data_field_positions": {"Name": [0, -150], "Attack": [100, 0], "Text": [0, 150]},
+        "card_image_path": CARD_IMAGE,
+    })
+
+
+def test_live_renderer_partial_repaints_match_full_renders(app):
+    renderer = CardRenderer(field_template())
+    live = LiveCardRenderer(renderer)
+    card = {"Name": "Goblin", "Attack": "3", "Text": "Deal 3 damage", "Illustration": CARD_IMAGE}
+    assert live.render_card(card) == renderer.render_card(card)
+
+    for name, value in (("Name", "Goblin King"), ("Attack", ""), ("Text", "Deal 3 damage\nto any target")):
+        card = dict(card, **{name: value})
+        assert live.render_card(card) == renderer.render_card(card), name
+    assert (live.full_renders, live.partial_renders) == (1, 3)
+
+
+def test_live_renderer_renders_in_full_when_more_than_fields_change(app):
+    renderer = CardRenderer(field_template())
+    live = LiveCardRenderer(renderer)
+    card = {"Name": "Goblin", "Attack": "3", "Text": "", "Illustration": CARD_IMAGE}
+    live.render_card(card)
+
+    card = dict(card, Illustration="")
+    assert live.render_card(card) == renderer.render_card(card)
+    assert (live.full_renders, live.partial_renders) == (2, 0)
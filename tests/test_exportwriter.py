@@ -0,0 +1,73 @@
+# tests/test_exportwriter.py
+import threading
+
+import pytest
+
+from exportwriter import BackgroundWriter, StreamedFile
+
+
+def fail(message):
+    raise OSError(message)
+
+
+def test_wait_returns_once_submitted_jobs_have_run():
+    started = threading.Event()
+    release = threading.Event()
+    written = []
+
+    def write(value):
+        started.set()
+        release.wait()
+        written.append(value)
+
+    writer = BackgroundWriter(max_pending=1)
+    writer.submit(write, 1)
+    started.wait()
+    waiter = threading.Thread(target=writer.wait)
+    waiter.start()
+    waiter.join(0.2)
+    assert waiter.is_alive()  # The job is still running
+
+    release.set()
+    waiter.join(5)
+    assert not waiter.is_alive()
+    assert written == [1]
+    writer.close()
+
+
+def test_first_error_is_raised_once_and_later_jobs_are_skipped():
+    written = []
+    errors = []
+    writer = BackgroundWriter(max_pending=1)
+    writer.submit(fail, "disk full")
+    for value in range(5):  # More than the queue holds, submit must not block for good
+        try:
+            writer.submit(written.append, value)
+        except OSError as e:
+            errors.append(str(e))
+    try:
+        writer.close()
+    except OSError as e:
+        errors.append(str(e))
+    assert errors == ["disk full"]
+    assert written == []
+
+
+def test_submit_raises_an_earlier_error():
+    writer = BackgroundWriter()
+    writer.submit(fail, "disk full")
+    with pytest.raises(OSError, match="disk full"):
+        writer.wait()
+    writer.submit(fail, "skipped")
+    writer.close()  # Raised already, the job after it never ran
+
+
+def test_streamed_file_writes_every_flushed_chunk(tmp_path):
+    path = tmp_path / "out.bin"
+    streamed = StreamedFile(str(path))
+    for chunk in (b"abc", b"", b"def"):
+        streamed.device.write(chunk)
+        streamed.flush()
+    streamed.device.write(b"g")
+    streamed.close()
+    assert path.read_bytes() == b"abcdefg"
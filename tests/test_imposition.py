@@ -0,0 +1,48 @@
+# tests/test_imposition.py
+from PyQt6.QtGui import QPageSize
+
+from imposition import AtlasLayout, SheetLayout
+
+LETTER = QPageSize(QPageSize.PageSizeId.Letter)  # 2550 x 3300 pixels at 300 DPI
+
+
+def test_sheet_grid_is_centred_on_the_page():
+    layout = SheetLayout(LETTER, 750, 1050, bleed=0)
+    assert (layout.columns, layout.rows) == (3, 3)
+    assert (layout.left, layout.top) == ((2550 - 3 * 750) / 2, (3300 - 3 * 1050) / 2)
+    assert layout.slot_rect(4).getRect() == (layout.left + 750, layout.top + 1050, 750, 1050)
+
+
+def test_sheet_gutter_separates_slots_and_can_cost_a_row():
+    layout = SheetLayout(LETTER, 750, 1050, bleed=0, gutter=30)
+    assert (layout.columns, layout.rows) == (3, 2)
+    assert layout.grid_width == 3 * 750 + 2 * 30
+    assert layout.slot_rect(1).left() - layout.slot_rect(0).right() == 30
+    assert layout.slot_rect(3).top() - layout.slot_rect(0).bottom() == 30
+
+
+def test_sheet_slots_include_bleed_and_trim_lines_exclude_it():
+    layout = SheetLayout(LETTER, 600, 900, bleed=36, gutter=10)
+    slot = layout.slot_rect(0)
+    assert (slot.width(), slot.height()) == (672, 972)
+    xs, ys = layout.trim_lines()
+    assert (xs[0], xs[1]) == (slot.left() + 36, slot.left() + 36 + 600)
+    assert (ys[0], ys[1]) == (slot.top() + 36, slot.top() + 36 + 900)
+
+
+def test_sheet_backs_are_mirrored_left_to_right():
+    layout = SheetLayout(LETTER, 750, 1050, bleed=0, gutter=30)
+    for slot in range(layout.cards_per_sheet):
+        row, column = divmod(slot, layout.columns)
+        mirrored = row * layout.columns + layout.columns - 1 - column
+        assert layout.slot_rect(slot, back=True) == layout.slot_rect(mirrored)
+
+
+def test_atlas_grid_is_clamped_to_sheet_bytes():
+    layout = AtlasLayout(1000, 1000, columns=10, rows=7, max_sheet_bytes=10 * 1000 * 1000 * 4 * 3)
+    assert (layout.columns, layout.rows) == (10, 3)
+    assert layout.sheet_width * layout.sheet_height * 4 <= 10 * 1000 * 1000 * 4 * 3
+
+
+def test_atlas_tile_larger_than_sheet_bytes_leaves_no_slots():
+    assert AtlasLayout(1000, 1000, max_sheet_bytes=1000).cards_per_sheet == 0
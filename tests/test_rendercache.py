@@ -0,0 +1,30 @@
+# tests/test_rendercache.py
+import json
+import os
+
+from cardtemplate import CardTemplate
+from rendercache import MANIFEST_FILE, RenderCache
+
+
+def export(dir_name, cards):
+    """Stand-in for export_png: store every card that is not reused"""
+    cache = RenderCache(dir_name, CardTemplate({}))
+    for i, card in enumerate(cards):
+        path = os.path.join(dir_name, f"card_{i + 1}.png")
+        key = cache.card_key(card)
+        if not cache.reuse(path, key):
+            cache.store(json.dumps(card).encode(), path, key)
+    cache.save(prune=True)
+    return cache
+
+
+def test_prune_drops_cards_no_longer_in_the_deck(tmp_path):
+    cards = [{"Name": f"Card {i}"} for i in range(8)]
+    export(str(tmp_path), cards)
+    cache = export(str(tmp_path), cards[:5])
+
+    with open(tmp_path / MANIFEST_FILE) as f:
+        manifest = json.load(f)
+    assert sorted(manifest["cards"]) == [f"card_{i}.png" for i in range(1, 6)]
+    assert sorted(name for name in os.listdir(tmp_path) if name.startswith("card_")) == sorted(manifest["cards"])
+    assert len(os.listdir(cache.cache_dir)) == 5
@@ -0,0 +1,44 @@
+# tests/test_svgoptimizer.py
+import xml.etree.ElementTree as ET
+
+from svgoptimizer import SVG_NS, optimize_svg
+
+CIRCLE = '<circle cx="50" cy="50" r="10" fill="red"/>'
+COVER = '<rect x="0" y="0" width="100" height="100" fill="blue"{}/>'
+
+
+def svg(body):
+    return f'<svg xmlns="{SVG_NS}" width="100" height="100">{body}</svg>'.encode()
+
+
+def circles(data):
+    return ET.fromstring(data).findall(f".//{{{SVG_NS}}}circle")
+
+
+def test_covered_shape_is_removed():
+    assert not circles(optimize_svg(svg(CIRCLE + COVER.format(""))))
+
+
+def test_cover_hidden_by_display_attribute_keeps_shapes_under_it():
+    assert circles(optimize_svg(svg(CIRCLE + COVER.format(' display="none"'))))
+
+
+def test_cover_hidden_by_display_style_keeps_shapes_under_it():
+    assert circles(optimize_svg(svg(CIRCLE + COVER.format(' style="fill:blue; display : none"'))))
+
+
+def test_cover_in_hidden_group_keeps_shapes_under_it():
+    body = CIRCLE + '<g style="display:none"><g>' + COVER.format("") + "</g></g>"
+    assert circles(optimize_svg(svg(body)))
+
+
+def test_cover_with_translucent_rgb_fill_keeps_shapes_under_it():
+    for fill in ("rgb(0,0,255,0.5)", "rgb(0 0 255 / 50%)"):
+        cover = f'<rect x="0" y="0" width="100" height="100" fill="{fill}"/>'
+        assert circles(optimize_svg(svg(CIRCLE + cover))), fill
+
+
+def test_cover_with_opaque_rgb_fill_hides_shapes_under_it():
+    for fill in ("rgb(0, 0, 255)", "rgb(0 0 100%)"):
+        cover = f'<rect x="0" y="0" width="100" height="100" fill="{fill}"/>'
+        assert not circles(optimize_svg(svg(CIRCLE + cover))), fill
@@ -0,0 +1,49 @@
+# tests/test_textlayout.py
+from PyQt6.QtCore import QRectF, Qt
+from PyQt6.QtGui import QColor, QFont, QImage, QPainter
+
+from textlayout import TextLayoutCache
+
+TEXTS = ("Goblin", "Deal 3 damage\nto any target", "trailing space ", "A much longer line than the box can hold")
+RECT = QRectF(20, 30, 200, 120)
+
+
+def painted(draw):
+    image = QImage(240, 180, QImage.Format.Format_ARGB32_Premultiplied)
+    image.fill(Qt.GlobalColor.white)
+    painter = QPainter(image)
+    font = QFont("Default")
+    font.setPixelSize(32)
+    painter.setFont(font)
+    painter.setPen(QColor("black"))
+    draw(painter)
+    painter.end()
+    return image
+
+
+def test_text_block_draws_the_pixels_of_draw_text(app):
+    cache = TextLayoutCache()
+    for text in TEXTS:
+        expected = painted(lambda painter: painter.drawText(RECT, Qt.AlignmentFlag.AlignCenter, text))
+        drawn = painted(lambda painter: cache.block(painter, RECT, text).draw(painter, RECT))
+        assert drawn == expected, text
+
+
+def test_text_block_bounding_rect_matches_draw_text(app):
+    cache = TextLayoutCache()
+    for text in TEXTS:
+        rects = []
+
+        def measure(painter):
+            rects.append(painter.boundingRect(RECT, Qt.AlignmentFlag.AlignCenter, text))
+            rects.append(cache.block(painter, RECT, text).bounding_rect(RECT))
+
+        painted(measure)
+        assert rects[0] == rects[1], text
+
+
+def test_repeated_text_is_laid_out_once(app):
+    cache = TextLayoutCache()
+    for _ in range(3):
+        painted(lambda painter: cache.block(painter, RECT, "Goblin").draw(painter, RECT))
+    assert (cache.stats()["hits"], cache.stats()["misses"]) == (2, 1)
@@ -0,0 +1,125 @@
+# textlayout.py
+import math
+import threading
+from collections import OrderedDict
+
+from PyQt6.QtCore import Qt, QPointF, QRectF
+from PyQt6.QtGui import QFontMetricsF, QTextLayout, QTextOption
+
+DEFAULT_MAX_ENTRIES = 512  # Laid out texts kept per render thread
+UNBOUNDED_LINE_WIDTH = 0x01000000  # Line width QPainter.drawText uses for unwrapped text
+
+
+class TextBlock:
+    """
+    A text laid out for centring in rectangles of one size.
+
+    Drawn with draw(painter, rect) it produces exactly the pixels of
+    painter.drawText(rect, Qt.AlignmentFlag.AlignCenter, text), including
+    the clip drawText applies when the text overflows rect.
+    """
+
+    def __init__(self, font, device, width, height, text):
+        # Fonts resolve against the device like drawText does, PDF and image metrics differ
+        self.layout = QTextLayout(text.replace("\n", "\u2028"), font, device)
+        option = QTextOption()
+        option.setFlags(QTextOption.Flag.IncludeTrailingSpaces)
+        self.layout.setTextOption(option)
+        self.layout.setCacheEnabled(True)
+
+        # Same line placement as QPainter.drawText: lines start on whole pixels
+        leading = QFontMetricsF(font, device).leading()
+        text_height = -leading
+        text_width = 0
+        self.layout.beginLayout()
+        while True:
+            line = self.layout.createLine()
+            if not line.isValid():
+                break
+            line.setLineWidth(UNBOUNDED_LINE_WIDTH)
+            text_height = math.ceil(text_height + leading)
+            line.setPosition(QPointF(0, text_height))
+            text_height += line.ascent() + line.descent()
+            text_width = max(text_width, line.naturalTextWidth())
+        self.layout.endLayout()
+
+        y = (height - text_height) / 2
+        self.lines = []
+        for index in range(self.layout.lineCount()):
+            line = self.layout.lineAt(index)
+            self.lines.append((line, QPointF((width - line.horizontalAdvance()) / 2, y)))
+        self.bounds = QRectF((width - text_width) / 2, y, text_width, text_height)
+        self.overflows = text_width > width or text_height > height
+
+    def bounding_rect(self, rect):
+        """Area the text covers when drawn into rect"""
+        return self.bounds.translated(rect.topLeft())
+
+    def draw(self, painter, rect):
+        if self.overflows:
+            painter.save()
+            painter.setClipRect(rect, Qt.ClipOperation.IntersectClip)
+        origin = rect.topLeft()
+        for line, offset in self.lines:
+            line.draw(painter, origin + offset)
+        if self.overflows:
+            painter.restore()
+
+
+class TextLayoutCache:
+    """
+    LRU cache of TextBlocks keyed by font, rect size and text.
+
+    QPainter.drawText shapes and lays out its text on every call, while a deck
+    repeats most field values (card types, stat numbers), so each distinct
+    text is laid out once and later cards only draw the prepared lines.
+
+    Every thread keeps its own entries: Qt's font engines are per thread and a
+    QTextLayout must not be drawn from two threads at once.
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._generation = 0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def block(self, painter, rect, text):
+        """Return the TextBlock for text centred in rect with the painter's font"""
+        font = painter.font()
+        device = painter.device()
+        key = (font.key(), device.logicalDpiY(), rect.width(), rect.height(), text)
+
+        entries = self._entries()
+        block = entries.get(key)
+        if block is not None:
+            entries.move_to_end(key)
+            with self._lock:
+                self.hits += 1
+            return block
+
+        block = TextBlock(font, device, rect.width(), rect.height(), text)
+        entries[key] = block
+        while len(entries) > self.max_entries:
+            entries.popitem(last=False)
+        with self._lock:
+            self.misses += 1
+        return block
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries())}
+
+    def clear(self):
+        """Drop the entries of every thread, each thread lets go of its own on next use"""
+        with self._lock:
+            self._generation += 1
+
+    def _entries(self):
+        local = self._local
+        if getattr(local, "generation", None) != self._generation:
+            local.entries = OrderedDict()
+            local.generation = self._generation
+        return local.entries